@@ -1,30 +1,67 @@
+import mmap
 import re
 from collections import defaultdict
-from matplotlib import pyplot as plt
+from contextlib import contextmanager
 import os
 import sys
 
+# Only open interactive windows when asked to; otherwise render off-screen
+SHOW = "--show" in sys.argv[2:]
+import matplotlib
+if not SHOW:
+    matplotlib.use("Agg")
+from matplotlib import pyplot as plt
+import numpy as np
+
+# Regex to extract size and time, from lines starting with the GameOfLife tag
+_RE_GOL = re.compile(rb"^GameOfLife: Size (\d+) Steps \d+ Time ([\d.]+)", re.MULTILINE)
+
+
+@contextmanager
+def _mapped(filename):
+    """Map the file read-only; an empty file (nothing to parse) cannot be mmapped"""
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            yield content
+
+
 if len(sys.argv) < 2:
-    print("Usage: python diagram.py <input_file>")
+    print("Usage: python diagram.py <input_file> [--show]")
     sys.exit(1)
 
-input_file = sys.argv[1]
+# Speedup of every run of a size against its first (1 thread) run.
+# Compiled with numba when it is installed, plain NumPy division otherwise.
+try:
+    from numba import njit
+except ImportError:
+    def _compute_speedups(time_row):
+        return time_row[0] / time_row
+else:
+    @njit(cache=True)
+    def _compute_speedups(time_row):
+        out = np.empty_like(time_row)
+        base = time_row[0]
+        for i in range(time_row.shape[0]):
+            out[i] = base / time_row[i]
+        return out
+
+    # Pay the JIT cost here rather than in the middle of the processing
+    _compute_speedups(np.ones(1))
 
-with open (input_file, 'r') as file:
-    input_data = file.read()
+input_file = sys.argv[1]
+_STEM = os.path.splitext(os.path.basename(input_file))[0]
 
 number_of_threads = [1, 2, 4, 6, 8]
 
 # Dictionary to store results
 results = defaultdict(list)
 
-# Regex to extract size and time
-pattern = re.compile(r"GameOfLife: Size (\d+) Steps \d+ Time ([\d.]+)")
-
-# Process each line
-for line in input_data.splitlines():
-    match = pattern.match(line)
-    if match:
+# Scan the log straight out of the page cache, only matching lines come back to Python
+with _mapped(input_file) as input_data:
+    for match in _RE_GOL.finditer(input_data):
         size = int(match.group(1))
         time = float(match.group(2))
         results[size].append(time)
@@ -32,11 +69,12 @@ for line in input_data.splitlines():
 # Convert defaultdict to regular dict before printing
 times = dict(results)
 
-speedup = {}
-for size, time_list in times.items():
-    speedup[size] = []
-    for i in range(0, len(time_list)):
-        speedup[size].append(round(time_list[0] / time_list[i], 4))
+# Each size is divided on its own, so sizes with a different number of runs are fine
+speedup = {size: np.round(_compute_speedups(np.asarray(time_list, dtype=np.float64)), 4).tolist()
+           for size, time_list in times.items()}
+
+# Sizes in plotting order, shared by both plots
+_SIZES = sorted(times.keys())
 
 # Display the result
 print(times)
@@ -46,7 +84,7 @@ print(speedup)
 def plot_times(times):
     fig, axs = plt.subplots(1, 3, figsize=(18, 6), sharey=False)
     colors = ['tab:blue', 'tab:orange', 'tab:green', 'tab:red', 'tab:purple', 'tab:brown', 'tab:pink', 'tab:gray']
-    sizes = sorted(times.keys())
+    sizes = _SIZES
     sizes_per_subplot = (len(sizes) + 2) // 3  # Divide sizes roughly equally
 
     for i in range(3):
@@ -68,20 +106,22 @@ def plot_times(times):
 
     plt.suptitle('Execution Time vs Number of Threads (Subdiagrams)')
     plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-    plt.savefig(f"times_{os.path.splitext(os.path.basename(input_file))[0]}.png")
-    plt.show()
+    plt.savefig(f"times_{_STEM}.png")
+    if SHOW:
+        plt.show()
 
 def plot_speedup(speedup):
     plt.figure(figsize=(10, 6))
-    for size, speedup_list in speedup.items():
-        plt.plot(number_of_threads, speedup_list, marker='o', label=f'Size {size}')
+    for size in _SIZES:
+        plt.plot(number_of_threads, speedup[size], marker='o', label=f'Size {size}')
     plt.xlabel('Number of Threads')
     plt.ylabel('Speedup')
     plt.title('Speedup vs Number of Threads')
     plt.legend()
     plt.grid(True)
-    plt.savefig(f"speedup_{os.path.splitext(os.path.basename(input_file))[0]}.png")
-    plt.show()
+    plt.savefig(f"speedup_{_STEM}.png")
+    if SHOW:
+        plt.show()
 
 plot_times(times)
 plot_speedup(speedup)
\ No newline at end of file
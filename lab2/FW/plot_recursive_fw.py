@@ -3,109 +3,122 @@
 Parse recursive FW results and produce bar plots (time and speedup) for each matrix size.
 
 Usage: python3 plot_recursive_fw.py
-Produces PNG files in lab2/FW/diagrams/
+Produces lab2/FW/diagrams/fw_recursive_all.svg, one row of plots per size
 """
 import re
 import os
 from collections import OrderedDict
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 
+# Emit SVG text as <text> instead of converting glyphs to paths
+plt.rcParams['svg.fonttype'] = 'none'
+
 ROOT = os.path.dirname(__file__)
 RESULTS = os.path.join(ROOT, "results", "recursive", "run_fw.out")
 OUTDIR = os.path.join(ROOT, "diagrams")
 os.makedirs(OUTDIR, exist_ok=True)
 
+_RE_SIZE = re.compile(r"-- SIZE:\s*(\d+) x (\d+) --")
+_RE_SERIAL = re.compile(r"FW,\s*(\d+),(\d+\.?\d*)")
+_RE_THREAD_TIME = re.compile(r"FW_SR,\s*N\s*=\s*(\d+),.*Time:\s*(\d+\.?\d*)")
+_RE_NTHREADS = re.compile(r"nthreads=(\d+)")
+
 
 def parse_fw_recursive(filepath):
     # Returns dict size -> { 'serial': float, 'threads': {t: time, ...} }
     data = {}
-    size_re = re.compile(r"-- SIZE:\s*(\d+) x (\d+) --")
-    serial_re = re.compile(r"FW,\s*(\d+),(\d+\.?\d*)")
-    thread_time_re = re.compile(r"FW_SR,\s*N\s*=\s*(\d+),.*Time:\s*(\d+\.?\d*)")
-
+    cur_size = None
+    cur_nthreads = None  # from the latest "nthreads=K:" line
     with open(filepath, "r", encoding="utf-8") as f:
-        lines = f.readlines()
+        for ln in f:
+            # Cheap substring checks first: most lines are blank
+            if "SIZE" in ln:
+                m = _RE_SIZE.search(ln)
+                if m:
+                    cur_size = int(m.group(1))
+                    cur_nthreads = None
+                    data[cur_size] = {"serial": None, "threads": {}}
+                    continue
 
-    cur_size = None
-    for i, ln in enumerate(lines):
-        m = size_re.search(ln)
-        if m:
-            cur_size = int(m.group(1))
-            data[cur_size] = {"serial": None, "threads": {}}
-            continue
+            if "nthreads=" in ln:
+                mth = _RE_NTHREADS.search(ln)
+                if mth:
+                    cur_nthreads = int(mth.group(1))
+                    continue
 
-        if cur_size is not None:
-            ms = serial_re.search(ln)
-            if ms and int(ms.group(1)) == cur_size:
-                data[cur_size]["serial"] = float(ms.group(2))
-                continue
-            mt = thread_time_re.search(ln)
-            if mt and int(mt.group(1)) == cur_size:
-                # Need to find the nthreads value above this block
-                # search backwards for "nthreads=K:"
-                nthreads = None
-                for j in range(i-1, max(i-6, -1), -1):
-                    mth = re.search(r"nthreads=(\d+)", lines[j])
-                    if mth:
-                        nthreads = int(mth.group(1))
-                        break
-                if nthreads is None:
-                    # fallback: if thread_time_re gives no info, skip
+            if cur_size is not None and "FW" in ln:
+                ms = _RE_SERIAL.search(ln)
+                if ms and int(ms.group(1)) == cur_size:
+                    data[cur_size]["serial"] = float(ms.group(2))
                     continue
-                data[cur_size]["threads"][nthreads] = float(mt.group(2))
+                mt = _RE_THREAD_TIME.search(ln)
+                if mt and int(mt.group(1)) == cur_size:
+                    if cur_nthreads is None:
+                        # no "nthreads=K:" line seen for this size, skip
+                        continue
+                    data[cur_size]["threads"][cur_nthreads] = float(mt.group(2))
 
     return data
 
 
+CANONICAL = [1, 2, 4, 8, 16, 32, 64]
+
+
+def _draw_size(time_ax, speedup_ax, size, serial, threads_map):
+    # Draws the time and speedup bars of one size into a row of the figure
+    # Build sequences: x labels = ['seq', '1','2',...]
+    x_labels = ["seq"] + [str(t) for t in CANONICAL]
+    # times: seq then canonical threads (fill missing with None)
+    times = [serial]
+    for t in CANONICAL:
+        times.append(threads_map.get(t, float('nan')))
+
+    # Time bar plot
+    x = list(range(len(x_labels)))
+    time_ax.bar(x, times, color='skyblue', edgecolor='black')
+    time_ax.set_xticks(x, x_labels)
+    time_ax.set_xlabel('Configuration')
+    time_ax.set_ylabel('Time (s)')
+    time_ax.set_title(f'FW recursive — Time (N={size})')
+    time_ax.grid(axis='y', linestyle=':', alpha=0.6)
+
+    # Speedup bar plot (baseline=serial)
+    speedups = [1.0]
+    for t in CANONICAL:
+        val = threads_map.get(t)
+        speedups.append(serial / val if val is not None and val != 0 else float('nan'))
+
+    speedup_ax.bar(x, speedups, color='orange', edgecolor='black')
+    speedup_ax.set_xticks(x, x_labels)
+    speedup_ax.set_xlabel('Configuration')
+    speedup_ax.set_ylabel('Speedup (baseline = seq)')
+    speedup_ax.set_title(f'FW recursive — Speedup (N={size})')
+    speedup_ax.grid(axis='y', linestyle=':', alpha=0.6)
+
+
 def make_plots(data):
-    canonical = [1, 2, 4, 8, 16, 32, 64]
+    rows = []
     for size, d in sorted(data.items()):
         serial = d.get("serial")
         threads_map = d.get("threads", {})
         if serial is None:
             print(f"Skipping size {size}: no serial time found")
             continue
+        rows.append((size, serial, threads_map))
+    if not rows:
+        return
 
-        # Build sequences: x labels = ['seq', '1','2',...]
-        x_labels = ["seq"] + [str(t) for t in canonical]
-        # times: seq then canonical threads (fill missing with None)
-        times = [serial]
-        for t in canonical:
-            times.append(threads_map.get(t, float('nan')))
-
-        # Time bar plot
-        x = list(range(len(x_labels)))
-        plt.figure(figsize=(8, 4.5))
-        plt.bar(x, times, color='skyblue', edgecolor='black')
-        plt.xticks(x, x_labels)
-        plt.xlabel('Configuration')
-        plt.ylabel('Time (s)')
-        plt.title(f'FW recursive — Time (N={size})')
-        plt.grid(axis='y', linestyle=':', alpha=0.6)
-        plt.subplots_adjust(bottom=0.15)
-        out = os.path.join(OUTDIR, f'time_fw_recursive_N{size}.svg')
-        plt.savefig(out, bbox_inches='tight')
-        plt.close()
-        print('Wrote', out)
-
-        # Speedup bar plot (baseline=serial)
-        speedups = [1.0]
-        for t in canonical:
-            val = threads_map.get(t)
-            speedups.append(serial / val if val is not None and val != 0 else float('nan'))
-
-        plt.figure(figsize=(8, 4.5))
-        plt.bar(x, speedups, color='orange', edgecolor='black')
-        plt.xticks(x, x_labels)
-        plt.xlabel('Configuration')
-        plt.ylabel('Speedup (baseline = seq)')
-        plt.title(f'FW recursive — Speedup (N={size})')
-        plt.grid(axis='y', linestyle=':', alpha=0.6)
-        plt.subplots_adjust(bottom=0.15)
-        out2 = os.path.join(OUTDIR, f'speedup_fw_recursive_N{size}.svg')
-        plt.savefig(out2, bbox_inches='tight')
-        plt.close()
-        print('Wrote', out2)
+    # One row per size (time | speedup), written out as a single file
+    fig, axes = plt.subplots(len(rows), 2, figsize=(16, 4.5 * len(rows)), squeeze=False)
+    for (time_ax, speedup_ax), (size, serial, threads_map) in zip(axes, rows):
+        _draw_size(time_ax, speedup_ax, size, serial, threads_map)
+    fig.tight_layout()
+    out = os.path.join(OUTDIR, 'fw_recursive_all.svg')
+    fig.savefig(out)
+    plt.close(fig)
+    print('Wrote', out)
 
 
 def main():
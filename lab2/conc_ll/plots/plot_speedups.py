@@ -1,49 +1,86 @@
+import mmap
+import os
 import re
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 from pathlib import Path
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# Emit SVG text as <text> instead of converting glyphs to paths
+plt.rcParams['svg.fonttype'] = 'none'
+# Stable ids so regenerated SVGs stay diffable; path simplification keeps its default
+# threshold, a coarser one would alter the speedup curves
+plt.rcParams['svg.hashsalt'] = 'conc_ll'
+
+# Serial baselines: one header per (size, workload tuple) followed by a single run.
+# Only the header line goes through the regex; the throughput is found with a plain search.
+_RE_SERIAL_HEADER = re.compile(rb'---\s+SIZE = (\d+) - PERCENTS = ([\d\s]+) ---')
+_THROUGHPUT = b'Throughput(Kops/sec): '
+# Parallel blocks: a header followed by one x.<impl> run per implementation.
+# Matched as a single alternation so the file is scanned once, in order.
+_RE_PARALLEL = re.compile(
+    rb'--- NTHREADS = (\d+) - SIZE = (\d+) - PERCENTS = ([\d\s]+) ---'
+    rb'|x\.(\w+).*?Throughput\(Kops/sec\):\s+([\d.]+)',
+    re.DOTALL
+)
+
+@contextmanager
+def _mapped(filename):
+    """Map the file read-only; an empty file (nothing to parse) cannot be mmapped"""
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            yield content
 
 def parse_conc_ll_results(filename: Path):
     """Parse a single concurrent linked list results file"""
-    with open(filename, 'r') as f:
-        content = f.read()
-
-    # Serial baselines per (size, workload tuple)
-    serial_pattern = r'---\s+SIZE = (\d+) - PERCENTS = ([\d\s]+) ---.*?Throughput\(Kops/sec\): ([\d.]+)'
-    serial_matches = re.findall(serial_pattern, content, re.DOTALL)
-    serial_baselines = {}
-    for size, percents, throughput in serial_matches:
-        key = (int(size), tuple(map(int, percents.split())))
-        # Keep the first seen value
-        if key not in serial_baselines:
-            serial_baselines[key] = float(throughput)
-
-    # Parallel blocks (one header followed by multiple impls)
-    header_pattern = r'--- NTHREADS = (\d+) - SIZE = (\d+) - PERCENTS = ([\d\s]+) ---'
-    parts = re.split(header_pattern, content)
-
-    data = {}  # {(size, percents): {impl: {threads: throughput}}}
-    for i in range(1, len(parts), 4):
-        if i + 3 >= len(parts):
-            break
-        nthreads = int(parts[i])
-        size = int(parts[i + 1])
-        percents_str = parts[i + 2]
-        block_content = parts[i + 3]
-        key = (size, tuple(map(int, percents_str.split())))
-
-        impl_pattern = r'x\.([\w]+).*?Throughput\(Kops/sec\):\s+([\d.]+)'
-        impl_matches = re.findall(impl_pattern, block_content, re.DOTALL)
-
-        for impl_name, throughput in impl_matches:
+    # mmap the log and scan it with bytes patterns: no full read/decode copy
+    with _mapped(filename) as content:
+        # Serial baselines per (size, workload tuple)
+        serial_baselines = {}
+        for m in _RE_SERIAL_HEADER.finditer(content):
+            idx = content.find(_THROUGHPUT, m.end())
+            if idx < 0:
+                break
+            key = (int(m.group(1)), tuple(map(int, m.group(2).split())))
+            # Keep the first seen value
+            if key not in serial_baselines:
+                start = idx + len(_THROUGHPUT)
+                serial_baselines[key] = float(content[start:start + 32].split()[0])
+
+        # Parallel blocks (one header followed by multiple impls)
+        data = defaultdict(lambda: defaultdict(dict))  # {(size, percents): {impl: {threads: throughput}}}
+        key = nthreads = None
+        for m in _RE_PARALLEL.finditer(content):
+            if m.group(1) is not None:
+                nthreads = int(m.group(1))
+                key = (int(m.group(2)), tuple(map(int, m.group(3).split())))
+                continue
+            if key is None:
+                # impl output before any parallel header
+                continue
+
+            impl_name = m.group(4).decode()
             # If this file is the nick-mod variant, rename nb_mod to nb_mod_nick
             if filename.name.endswith('_nb_mod_nick.out') and impl_name == 'nb_mod':
                 impl_name = 'nb_mod_nick'
-            throughput = float(throughput)
-            data.setdefault(key, {}).setdefault(impl_name, {})[nthreads] = throughput
+            throughput = float(m.group(5))
+            data[key][impl_name][nthreads] = throughput
 
-    return serial_baselines, data
+    # Back to plain dicts so lookups of missing keys fail loudly downstream
+    return serial_baselines, {k: {impl: dict(thr) for impl, thr in v.items()} for k, v in data.items()}
+
+def thread_counts(data):
+    """Sorted thread counts seen per configuration, across all implementations"""
+    return {cfg: sorted({t for d in impls.values() for t in d}) for cfg, impls in data.items()}
 
 def merge_results(acc_serial, acc_data, serial_add, data_add):
     # Merge serial baselines (keep existing if present)
@@ -56,77 +93,97 @@ def merge_results(acc_serial, acc_data, serial_add, data_add):
             acc_data[cfg].setdefault(impl, {})
             acc_data[cfg][impl].update(thr_map)
 
-def plot_speedup(serial_baselines, data, output_dir):
+IMPL_NAMES = {
+    'cgl': 'Coarse-Grained',
+    'fgl': 'Fine-Grained',
+    'lazy': 'Lazy Sync',
+    'nb': 'Non-Blocking',
+    'opt': 'Optimistic',
+    'nb_mod': 'Non-Blocking (Modified)',
+    'nb_mod_nick': 'Non-Blocking (Nick)'
+}
+
+# tab10 palette, looked up once and indexed per implementation
+_TAB10 = plt.cm.tab10(np.arange(10))
+
+# Per-process figure, cleared and reused for every configuration
+_fig_ax = None
+
+def _figure():
+    global _fig_ax
+    if _fig_ax is None:
+        _fig_ax = plt.subplots(figsize=(10, 6))
+    fig, ax = _fig_ax
+    ax.clear()
+    return fig, ax
+
+def _render_one(config_key, impl_data, all_threads, serial_throughput, output_dir):
+    """Draw and save the speedup plot of one configuration, return its path"""
+    size, percents = config_key
+    read, insert, delete = percents
+
+    fig, ax = _figure()
+    # Local aliases for the per-implementation loop
+    name, plot = IMPL_NAMES.get, ax.plot
+
+    for idx, (impl, results) in enumerate(sorted(impl_data.items())):
+        threads = [t for t in all_threads if t in results]
+        if threads:
+            speedups = np.array([results[t] for t in threads]) / serial_throughput
+            label = name(impl, impl)
+            plot(
+                threads, speedups, 'o-',
+                label=label, color=_TAB10[idx % 10],
+                linewidth=2, markersize=6, markeredgecolor='black', markeredgewidth=0.5
+            )
+
+    ax.set_xlabel('Number of threads', fontsize=12)
+    ax.set_ylabel('Speedup (baseline: serial)', fontsize=12)
+    ax.set_title(f'Speedup — Size={size}, Workload={read}/{insert}/{delete}', fontsize=13)
+
+    # Regular (linear) scale for both axes
+    # Ensure ticks align with available thread counts
+    ax.set_xticks(all_threads)
+    ax.set_xticklabels([str(t) for t in all_threads])
+
+    ax.grid(True, which="both", ls="-", alpha=0.2)
+    ax.grid(True, which="major", ls="-", alpha=0.5)
+
+    # Legend outside
+    ax.legend(bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0, fontsize=10)
+
+    fig.tight_layout()
+    filename = f'speedup_size{size}_workload{read}_{insert}_{delete}.svg'
+    filepath = output_dir / filename
+    fig.savefig(filepath, format='svg')
+    return filepath
+
+def plot_speedup(serial_baselines, data, output_dir, config_threads=None):
     """Generate speedup plots for each configuration"""
     output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True)
+    if config_threads is None:
+        config_threads = thread_counts(data)
 
-    impl_names = {
-        'cgl': 'Coarse-Grained',
-        'fgl': 'Fine-Grained',
-        'lazy': 'Lazy Sync',
-        'nb': 'Non-Blocking',
-        'opt': 'Optimistic',
-        'nb_mod': 'Non-Blocking (Modified)',
-        'nb_mod_nick': 'Non-Blocking (Nick)'
-    }
-
+    keys, impls, threads, serials = [], [], [], []
     for config_key, impl_data in sorted(data.items()):
-        size, percents = config_key
-        read, insert, delete = percents
-
         if config_key not in serial_baselines:
+            size, percents = config_key
             print(f"Warning: No serial baseline for Size={size}, Workload={percents}")
             continue
+        keys.append(config_key)
+        impls.append(impl_data)
+        threads.append(config_threads[config_key])
+        serials.append(serial_baselines[config_key])
 
-        serial_throughput = serial_baselines[config_key]
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-
-        all_threads = sorted({t for impl_results in impl_data.values() for t in impl_results.keys()})
-
-        colors = plt.cm.tab10(np.arange(len(impl_data)) % 10)
-        for idx, (impl, results) in enumerate(sorted(impl_data.items())):
-            threads = []
-            speedups = []
-            for t in all_threads:
-                if t in results:
-                    threads.append(t)
-                    speedups.append(results[t] / serial_throughput)
-            if threads:
-                label = impl_names.get(impl, impl)
-                ax.plot(
-                    threads, speedups, 'o-',
-                    label=label, color=colors[idx % len(colors)],
-                    linewidth=2, markersize=6, markeredgecolor='black', markeredgewidth=0.5
-                )
-
-        ax.set_xlabel('Number of threads', fontsize=12)
-        ax.set_ylabel('Speedup (baseline: serial)', fontsize=12)
-        ax.set_title(f'Speedup — Size={size}, Workload={read}/{insert}/{delete}', fontsize=13)
-
-        # Regular (linear) scale for both axes
-        # Ensure ticks align with available thread counts
-        ax.set_xticks(all_threads)
-        ax.set_xticklabels([str(t) for t in all_threads])
-
-        ax.grid(True, which="both", ls="-", alpha=0.2)
-        ax.grid(True, which="major", ls="-", alpha=0.5)
-        
-        # Legend outside
-        ax.legend(bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0, fontsize=10)
-        
-        plt.tight_layout()
-        filename = f'speedup_size{size}_workload{read}_{insert}_{delete}.svg'
-        filepath = output_dir / filename
-        plt.savefig(filepath, format='svg', bbox_inches='tight')
-        print(f"Saved: {filepath}")
-        plt.close()
-
-def print_summary(serial_baselines, data):
-    print("\n" + "="*120)
-    print("SPEEDUP SUMMARY")
-    print("="*120)
+    # Configurations are independent: render them on all cores
+    with ProcessPoolExecutor() as ex:
+        for filepath in ex.map(_render_one, keys, impls, threads, serials, [output_dir] * len(keys)):
+            print(f"Saved: {filepath}")
+
+def print_summary(serial_baselines, data, config_threads=None):
+    if config_threads is None:
+        config_threads = thread_counts(data)
 
     impl_names = {
         'cgl': 'Coarse-Grained',
@@ -138,34 +195,35 @@ def print_summary(serial_baselines, data):
         'nb_mod_nick': 'NB-Nick'
     }
 
+    name = impl_names.get
+
+    # Build the whole report and write it out at once
+    out = ["\n" + "="*120 + "\n", "SPEEDUP SUMMARY\n", "="*120 + "\n"]
+    append = out.append
+
     for config_key, impl_data in sorted(data.items()):
         size, percents = config_key
         read, insert, delete = percents
         serial_throughput = serial_baselines.get(config_key, 0.0)
 
-        print(f"\nConfiguration: Size={size}, Workload={read}/{insert}/{delete}")
-        print(f"Serial baseline: {serial_throughput:.2f} Kops/sec")
-        print("-" * 120)
+        append(f"\nConfiguration: Size={size}, Workload={read}/{insert}/{delete}\n")
+        append(f"Serial baseline: {serial_throughput:.2f} Kops/sec\n")
+        append("-" * 120 + "\n")
 
-        all_threads = sorted({t for impl_results in impl_data.values() for t in impl_results.keys()})
+        all_threads = config_threads[config_key]
 
-        print(f"{'Implementation':<22}", end='')
-        for t in all_threads:
-            print(f"{t:>8} thr", end='')
-        print()
-        print("-" * 120)
+        append(f"{'Implementation':<22}" + "".join(f"{t:>8} thr" for t in all_threads) + "\n")
+        append("-" * 120 + "\n")
 
         for impl in sorted(impl_data.keys()):
             results = impl_data[impl]
-            impl_label = impl_names.get(impl, impl)
-            print(f"{impl_label:<22}", end='')
-            for t in all_threads:
-                if t in results and serial_throughput > 0:
-                    speedup = results[t] / serial_throughput
-                    print(f"{speedup:>11.2f}x", end='')
-                else:
-                    print(f"{'N/A':>12}", end='')
-            print()
+            impl_label = name(impl, impl)
+            append(f"{impl_label:<22}" + "".join(
+                f"{results[t] / serial_throughput:>11.2f}x" if t in results and serial_throughput > 0 else f"{'N/A':>12}"
+                for t in all_threads
+            ) + "\n")
+
+    sys.stdout.write("".join(out))
 
 def main():
     # File paths
@@ -175,6 +233,7 @@ def main():
     # Parse results
     print("Parsing results...")
     serial_baselines, data = parse_conc_ll_results(results_file)
+    config_threads = thread_counts(data)
     
     print(f"\nFound {len(serial_baselines)} serial baselines")
     print(f"Found {len(data)} parallel configurations")
@@ -191,9 +250,9 @@ def main():
     output_dir = Path('/home/nicholas/parallelSystems/lab2/conc_ll/plots')
 
     print("\nGenerating plots...")
-    plot_speedup(serial_baselines, data, output_dir)
+    plot_speedup(serial_baselines, data, output_dir, config_threads)
 
-    print_summary(serial_baselines, data)
+    print_summary(serial_baselines, data, config_threads)
 
     print("\n" + "="*120)
     print("Done!")
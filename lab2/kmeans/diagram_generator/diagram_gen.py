@@ -1,7 +1,14 @@
 import re
 import sys
 from typing import List, Dict
-from matplotlib import pyplot as plt
+
+_RE_HEADER = re.compile(
+	r"dataset_size\s*=\s*([\d\.]+)\s*MB\s+numObjs\s*=\s*(\d+)\s+numCoords\s*=\s*(\d+)\s+numClusters\s*=\s*(\d+)"
+)
+_RE_THREADS = re.compile(r"\(number of threads:\s*(\d+)\)")
+_RE_TIMING = re.compile(
+	r"nloops\s*=\s*(\d+)\s*\(total\s*=\s*([\d\.]+)s\)\s*\(per loop\s*=\s*([\d\.]+)s\)"
+)
 
 def parse_results(filepath: str) -> List[Dict]:
 	"""
@@ -9,54 +16,36 @@ def parse_results(filepath: str) -> List[Dict]:
 	 dataset_size_MB, numObjs, numCoords, numClusters,
 	 numThreads, nloops, total_time_s, per_loop_time_s
 	"""
-	header_re = re.compile(
-		r"dataset_size\s*=\s*([\d\.]+)\s*MB\s+numObjs\s*=\s*(\d+)\s+numCoords\s*=\s*(\d+)\s+numClusters\s*=\s*(\d+)"
-	)
-	threads_re = re.compile(r"\(number of threads:\s*(\d+)\)")
-	timing_re = re.compile(
-		r"nloops\s*=\s*(\d+)\s*\(total\s*=\s*([\d\.]+)s\)\s*\(per loop\s*=\s*([\d\.]+)s\)"
-	)
-
 	results = []
+	entry = None  # run currently being filled in, None once its timing is seen
 	with open(filepath, "r", encoding="utf-8") as f:
-		lines = f.readlines()
-
-	i = 0
-	while i < len(lines):
-		mh = header_re.search(lines[i])
-		if mh:
-			entry = {
-				"dataset_size_MB": float(mh.group(1)),
-				"numObjs": int(mh.group(2)),
-				"numCoords": int(mh.group(3)),
-				"numClusters": int(mh.group(4)),
-				"numThreads": None,
-				"nloops": None,
-				"total_time_s": None,
-				"per_loop_time_s": None,
-			}
-			# scan forward for threads and timing until next header or EOF
-			j = i + 1
-			while j < len(lines):
-				# stop if new header encountered
-				if header_re.search(lines[j]):
-					break
-				mt = threads_re.search(lines[j])
-				if mt:
-					entry["numThreads"] = int(mt.group(1))
-				mti = timing_re.search(lines[j])
-				if mti:
-					entry["nloops"] = int(mti.group(1))
-					entry["total_time_s"] = float(mti.group(2))
-					entry["per_loop_time_s"] = float(mti.group(3))
-					# once timing found we can consider this run complete
-					break
-				j += 1
-			results.append(entry)
-			# continue from j to avoid re-parsing same block
-			i = j
-		else:
-			i += 1
+		for line in f:
+			mh = _RE_HEADER.search(line) if "dataset_size" in line else None
+			if mh:
+				entry = {
+					"dataset_size_MB": float(mh.group(1)),
+					"numObjs": int(mh.group(2)),
+					"numCoords": int(mh.group(3)),
+					"numClusters": int(mh.group(4)),
+					"numThreads": None,
+					"nloops": None,
+					"total_time_s": None,
+					"per_loop_time_s": None,
+				}
+				results.append(entry)
+				continue
+			if entry is None:
+				continue
+			mt = _RE_THREADS.search(line) if "threads:" in line else None
+			if mt:
+				entry["numThreads"] = int(mt.group(1))
+			mti = _RE_TIMING.search(line) if "nloops" in line else None
+			if mti:
+				entry["nloops"] = int(mti.group(1))
+				entry["total_time_s"] = float(mti.group(2))
+				entry["per_loop_time_s"] = float(mti.group(3))
+				# once timing found we can consider this run complete
+				entry = None
 	return results
 
 if __name__ == "__main__":
@@ -1,26 +1,74 @@
+import io
+import json
 import os
-import glob
+import pickle
 import sys
-from collections import defaultdict, OrderedDict
-from typing import List
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
 
 HERE = os.path.dirname(__file__)
 sys.path.insert(0, HERE)
 
 from diagram_gen import parse_results
 
-import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Matplotlib is only imported once something is plotted, see _lazy_plt
+plt = None
+_TAB10 = None  # tab10 palette as an RGBA array, looked up once
+
+
+def _lazy_plt():
+    global plt, _TAB10
+    if plt is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as pyplot
+        # Emit SVG text as <text> instead of converting glyphs to paths
+        pyplot.rcParams['svg.fonttype'] = 'none'
+        plt = pyplot
+        _TAB10 = pyplot.cm.tab10(np.arange(10))
+    return plt
 
 
 def find_result_files(results_root: str) -> List[str]:
-    patterns = [os.path.join(results_root, "**", "run_*.out"), os.path.join(results_root, "**", "run_*.err")]
+    # One walk over the tree for both suffixes; hidden dirs are skipped as glob did
     files = []
-    for p in patterns:
-        files.extend(glob.glob(p, recursive=True))
-    files = sorted(files)
+    for dirpath, dirnames, filenames in os.walk(results_root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for fn in filenames:
+            if fn.startswith("run_") and fn.endswith((".out", ".err")):
+                files.append(os.path.join(dirpath, fn))
+    # Each run's .out directly followed by its .err sibling
+    files = sorted(files, key=lambda f: (os.path.splitext(f)[0], not f.endswith(".out")))
     return files
 
 
+def load_parse_cache(cache_path: str) -> dict:
+    # {abs path: ((st_mtime_ns, st_size), entries)}; a missing or unreadable cache is empty
+    try:
+        with open(cache_path, "rb") as fh:
+            return pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return {}
+
+
+def save_parse_cache(cache_path: str, cache: dict):
+    # Write to a temporary file first so an interrupted run never leaves a torn cache
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as fh:
+        pickle.dump(cache, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
+
 def label_for_path(filepath: str, results_root: str) -> str:
     rel = os.path.relpath(filepath, results_root)
     parts = rel.split(os.sep)
@@ -32,75 +80,195 @@ def label_for_path(filepath: str, results_root: str) -> str:
     return parts[0]
 
 
-def aggregate_runs(files: List[str], results_root: str):
-    data = defaultdict(dict)
-    raw_entries = defaultdict(list)
-    metadata = {}  # Store dataset metadata per label
-    sequential_data = {}  # Store sequential times per config
+CONFIG_COLUMNS = ['dataset_size_MB', 'numCoords', 'numClusters']
+META_COLUMNS = CONFIG_COLUMNS + ['numObjs']
+
+
+def aggregate_runs(files: List[str], results_root: str, cache_path: Optional[str] = None):
+    rows = []
+    parsed_runs = set()  # runs whose .out already produced entries
+    cache = load_parse_cache(cache_path) if cache_path else {}
+    cache_dirty = False
     
     for f in files:
-        try:
-            entries = parse_results(f)
-        except Exception as e:
-            print(f"Failed to parse {f}: {e}")
+        run, ext = os.path.splitext(f)
+        if ext == ".err" and run in parsed_runs:
             continue
+        key = os.path.abspath(f)
+        st = os.stat(f)
+        stamp = (st.st_mtime_ns, st.st_size)
+        hit = cache.get(key)
+        if hit is not None and hit[0] == stamp:
+            entries = hit[1]
+        else:
+            try:
+                entries = parse_results(key)
+            except Exception as e:
+                print(f"Failed to parse {f}: {e}")
+                continue
+            cache[key] = (stamp, entries)
+            cache_dirty = True
         if not entries:
             continue
+        parsed_runs.add(run)
         label = label_for_path(f, results_root)
         
         # Check if this is a sequential run
         is_sequential = 'sequential' in label.lower()
         
         for e in entries:
-            t = e.get("numThreads")
-            time = e.get("per_loop_time_s")
-            
-            # Create config key
-            config_key = (
-                e.get('dataset_size_MB'),
-                e.get('numCoords'),
-                e.get('numClusters')
-            )
-            
-            # Handle sequential runs (no numThreads)
-            if is_sequential and time is not None and t is None:
-                sequential_data[config_key] = time
-                if label not in metadata:
-                    metadata[label] = {
-                        'dataset_size_MB': e.get('dataset_size_MB'),
-                        'numCoords': e.get('numCoords'),
-                        'numClusters': e.get('numClusters'),
-                        'numObjs': e.get('numObjs')
-                    }
-                continue
-            
-            if t is None or time is None:
-                continue
-            if t in data[label]:
-                data[label][t] = min(data[label][t], time)
-            else:
-                data[label][t] = time
-            raw_entries[label].append((t, time))
-            # Store metadata (same for all runs of the same label)
-            if label not in metadata:
-                metadata[label] = {
-                    'dataset_size_MB': e.get('dataset_size_MB'),
-                    'numCoords': e.get('numCoords'),
-                    'numClusters': e.get('numClusters'),
-                    'numObjs': e.get('numObjs')
-                }
-    return data, raw_entries, metadata, sequential_data
+            row = {c: e.get(c) for c in META_COLUMNS}
+            row['label'] = label
+            row['numThreads'] = e.get("numThreads")
+            row['per_loop_time_s'] = e.get("per_loop_time_s")
+            # Sequential runs report no numThreads
+            row['is_sequential'] = is_sequential and row['numThreads'] is None
+            rows.append(row)
+
+    if cache_path and cache_dirty:
+        save_parse_cache(cache_path, cache)
+
+    df = pd.DataFrame(rows, columns=META_COLUMNS + ['label', 'numThreads', 'per_loop_time_s', 'is_sequential'])
+    df = df[df['per_loop_time_s'].notna()]
+    seq = df[df['is_sequential'].astype(bool)]
+    par = df[~df['is_sequential'].astype(bool) & df['numThreads'].notna()].astype({'numThreads': int})
+
+    # Store sequential times per config (the last run of a config wins)
+    seq_times = seq.groupby(CONFIG_COLUMNS, sort=False)['per_loop_time_s'].last()
+    sequential_data = {tuple(k): v for k, v in seq_times.to_dict().items()}
+
+    # Best (minimum) per-loop time per implementation and thread count
+    data = defaultdict(dict)
+    best = par.groupby(['label', 'numThreads'], sort=False)['per_loop_time_s'].min()
+    for (label, t), time in best.to_dict().items():
+        data[label][t] = time
+
+    # Store dataset metadata per label (same for all runs of the same label)
+    kept = pd.concat([seq, par]).sort_index()
+    metadata = kept.groupby('label', sort=False)[META_COLUMNS].first().to_dict(orient='index')
+    return data, metadata, sequential_data
+
+
+# Finished SVGs are written to disk by a few threads while the next figure is drawn
+_writer = None
+_pending_writes = []
+
+
+def _write_file(path: str, payload: bytes):
+    with open(path, "wb") as fh:
+        fh.write(payload)
+
+
+def _write_async(path: str, payload: bytes):
+    global _writer
+    if _writer is None:
+        _writer = ThreadPoolExecutor(max_workers=4)
+    _pending_writes.append(_writer.submit(_write_file, path, payload))
+
+
+def _flush_writes():
+    # Wait for every queued write, re-raising any I/O error
+    while _pending_writes:
+        _pending_writes.pop().result()
+
+
+def _finish(fig, ax, path, title, ylabel, xticks, x_labels, config_text, text_x=0.5):
+    ax.set_xlabel("Number of threads")
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.grid(axis='y', linestyle=':', alpha=0.6)
+    ax.set_xticks(xticks, x_labels)
+    # Configuration text below the plot, as a figure label so the layout engine makes room for it
+    fig.supxlabel(config_text, x=text_x, fontsize=9, style='italic')
+    # Render now since the figure is reused, only the disk write is deferred
+    buf = io.BytesIO()
+    fig.savefig(buf, format="svg")
+    _write_async(path, buf.getvalue())
+
+
+def draw_bar(fig, ax, path, x, y, title, ylabel, x_labels, config_text, **bar_kw):
+    """Redraw the reused figure as a single bar series and save it to path"""
+    # Clear the reused figure; the config text is overwritten by _finish
+    ax.clear()
+    ax.bar(x, y, edgecolor='black', width=0.6, **bar_kw)
+    _finish(fig, ax, path, title, ylabel, x, x_labels, config_text)
+
+
+CANONICAL = [1, 2, 4, 8, 16, 32, 64]
+
+# Per-process figure, reused for every time and speedup plot a worker draws
+_label_fig = None
+
+
+def _label_figure():
+    global _label_fig
+    if _label_fig is None:
+        _label_fig = _lazy_plt().subplots(figsize=(8, 4.5), layout='constrained')
+    return _label_fig
+
+
+def config_labels(config_key):
+    """Caption text and filename suffix of one (dataset_size_MB, numCoords, numClusters) config"""
+    dataset_size, num_coords, num_clusters = config_key
+    config_text = ""
+    config_suffix = ""
+    if dataset_size is not None:
+        config_text = f"Dataset: {dataset_size:.2f} MB"
+        config_suffix += f"_{int(dataset_size)}MB"
+    if num_coords is not None:
+        config_text += f"  |  Coordinates: {num_coords}"
+        config_suffix += f"_{num_coords}coords"
+    if num_clusters is not None:
+        config_text += f"  |  Clusters: {num_clusters}"
+        config_suffix += f"_{num_clusters}clusters"
+    return config_text, config_suffix
+
+
+def render_label(label, thread_map, config_text, seq_time, out_dir):
+    """Draw the time and speedup plots of one implementation, return their paths"""
+    # Build data with sequential as first entry, CANONICAL already gives the thread order
+    present = [t for t in CANONICAL if t in thread_map]
+    threads = ['seq'] + present
+    times = np.asarray([seq_time] + [thread_map[t] for t in present])
+
+    if len(times) <= 1:  # Only sequential, no parallel data
+        return []
+
+    # Use sequential time as baseline for speedup
+    speedups = seq_time / times
+
+    safe_label = label.replace("/", "_").replace(" ", "_")
+
+    # Create x positions with equal spacing
+    x_positions = list(range(len(threads)))
+    x_labels = [str(t) for t in threads]
+
+    fig, ax = _label_figure()
+
+    # Execution time bar plot
+    time_file = os.path.join(out_dir, f"time_{safe_label}.svg")
+    draw_bar(fig, ax, time_file, x_positions, times, f"Execution time — {label}",
+             "Per-loop time (s)", x_labels, config_text, color='red')
+
+    # Speedup bar plot
+    speed_file = os.path.join(out_dir, f"speedup_{safe_label}.svg")
+    draw_bar(fig, ax, speed_file, x_positions, speedups, f"Speedup — {label}",
+             "Speedup (baseline: sequential)", x_labels, config_text, color='lightblue')
+
+    _flush_writes()
+    return [time_file, speed_file]
 
 
 def plot_per_implementation(data, out_dir: str, metadata: dict, sequential_data: dict):
     os.makedirs(out_dir, exist_ok=True)
     created = []
-    canonical = [1, 2, 4, 8, 16, 32, 64]
 
+    tasks = []
+    # Labels sharing a dataset configuration share its caption, format it once
+    config_info = {}
     for label, thread_map in data.items():
         if not thread_map:
             continue
-        ordered = OrderedDict(sorted(thread_map.items()))
         
         # Get config key for this label
         meta = metadata.get(label, {})
@@ -115,71 +283,24 @@ def plot_per_implementation(data, out_dir: str, metadata: dict, sequential_data:
         if seq_time is None:
             print(f"Warning: No sequential baseline found for {label}, skipping...")
             continue
-        
-        # Build data with sequential as first entry
-        threads = ['seq'] + [t for t in canonical if t in ordered]
-        times = [seq_time] + [ordered[t] for t in canonical if t in ordered]
+        if config_key not in config_info:
+            config_info[config_key] = config_labels(config_key)
+        config_text, _ = config_info[config_key]
+        tasks.append((label, dict(thread_map), config_text, seq_time, out_dir))
 
-        if len(times) <= 1:  # Only sequential, no parallel data
-            continue
+    if not tasks:
+        return created
 
-        # Use sequential time as baseline for speedup
-        baseline = seq_time
-        speedups = [baseline / t for t in times]
-
-        safe_label = label.replace("/", "_").replace(" ", "_")
-
-        # Create x positions with equal spacing
-        x_positions = list(range(len(threads)))
-        x_labels = [str(t) for t in threads]
-
-        config_text = ""
-        if meta.get('dataset_size_MB') is not None:
-            config_text = f"Dataset: {meta['dataset_size_MB']:.2f} MB"
-        if meta.get('numCoords') is not None:
-            config_text += f"  |  Coordinates: {meta['numCoords']}"
-        if meta.get('numClusters') is not None:
-            config_text += f"  |  Clusters: {meta['numClusters']}"
-
-        # Execution time bar plot
-        plt.figure(figsize=(8, 4.5))
-        plt.bar(x_positions, times, color='red', edgecolor='black', width=0.6)
-        plt.xlabel("Number of threads")
-        plt.ylabel("Per-loop time (s)")
-        plt.title(f"Execution time — {label}")
-        plt.grid(axis='y', linestyle=':', alpha=0.6)
-        plt.xticks(x_positions, x_labels)
-        # Add configuration text below the plot
-        if config_text:
-            plt.subplots_adjust(bottom=0.15)
-            plt.figtext(0.5, 0.02, config_text, ha='center', fontsize=9, style='italic')
-        time_file = os.path.join(out_dir, f"time_{safe_label}.svg")
-        plt.savefig(time_file, bbox_inches="tight")
-        plt.close()
-
-        # Speedup bar plot
-        plt.figure(figsize=(8, 4.5))
-        plt.bar(x_positions, speedups, color='lightblue', edgecolor='black', width=0.6)
-        plt.xlabel("Number of threads")
-        plt.ylabel(f"Speedup (baseline: sequential)")
-        plt.title(f"Speedup — {label}")
-        plt.grid(axis='y', linestyle=':', alpha=0.6)
-        plt.xticks(x_positions, x_labels)
-        # Add configuration text below the plot
-        if config_text:
-            plt.subplots_adjust(bottom=0.15)
-            plt.figtext(0.5, 0.02, config_text, ha='center', fontsize=9, style='italic')
-        speed_file = os.path.join(out_dir, f"speedup_{safe_label}.svg")
-        plt.savefig(speed_file, bbox_inches="tight")
-        plt.close()
-
-        created.extend([time_file, speed_file])
+    # Labels are independent: render them on all cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        for files in ex.map(render_label, *zip(*tasks)):
+            created.extend(files)
     return created
 
 
 def plot_combined(data, out_dir: str, metadata: dict, sequential_data: dict):
     os.makedirs(out_dir, exist_ok=True)
-    canonical = [1, 2, 4, 8, 16, 32, 64]
+    canonical = CANONICAL
     created = []
     
     # Group implementations by their dataset configuration
@@ -196,6 +317,11 @@ def plot_combined(data, out_dir: str, metadata: dict, sequential_data: dict):
         )
         config_groups[config_key].append(label)
     
+    # One figure reused for every combined plot; 'seq' takes the first x position
+    fig, ax = _lazy_plt().subplots(figsize=(12, 6), layout='constrained')
+    x_base = np.arange(len(canonical) + 1)
+    x_labels = ['seq'] + [str(t) for t in canonical]
+
     # Create combined plots for each unique configuration
     for config_key, labels in config_groups.items():
         if len(labels) < 2:  # Skip if only one implementation with this config
@@ -207,108 +333,79 @@ def plot_combined(data, out_dir: str, metadata: dict, sequential_data: dict):
             print(f"Warning: No sequential baseline for config {config_key}, skipping combined plot...")
             continue
             
-        dataset_size, num_coords, num_clusters = config_key
-        
         # Create config text and safe filename
-        config_text = ""
-        config_suffix = ""
-        if dataset_size is not None:
-            config_text = f"Dataset: {dataset_size:.2f} MB"
-            config_suffix += f"_{int(dataset_size)}MB"
-        if num_coords is not None:
-            config_text += f"  |  Coordinates: {num_coords}"
-            config_suffix += f"_{num_coords}coords"
-        if num_clusters is not None:
-            config_text += f"  |  Clusters: {num_clusters}"
-            config_suffix += f"_{num_clusters}clusters"
-        
-        # Add 'seq' as first position
-        x_positions = list(range(len(canonical) + 1))
-        x_labels = ['seq'] + [str(t) for t in canonical]
+        config_text, config_suffix = config_labels(config_key)
         
-        # Combined execution time bar plot
-        plt.figure(figsize=(12, 6))
+        # (labels x [seq] + canonical) matrix of times, NaN where a thread count was not run
+        times_mat = np.array([[seq_time] + [data[label].get(t, np.nan) for t in canonical] for label in labels])
+        present = ~np.isnan(times_mat)
+        speedups_mat = seq_time / times_mat
+
         bar_width = 0.8 / len(labels)
-        colors = plt.cm.tab10(range(len(labels)))
-        
-        for idx, label in enumerate(labels):
-            thread_map = data[label]
-            ordered = OrderedDict(sorted(thread_map.items()))
-            # Start with sequential time
-            times = [seq_time]
-            x_pos = [0 + idx * bar_width]
-            for i, t in enumerate(canonical):
-                if t in ordered:
-                    times.append(ordered[t])
-                    x_pos.append((i + 1) + idx * bar_width)
-            
-            plt.bar(x_pos, times, width=bar_width, label=label, 
-                    edgecolor='black', linewidth=0.5, color=colors[idx])
-        
-        plt.xlabel("Number of threads")
-        plt.ylabel("Per-loop time (s)")
-        plt.title("Execution time — all implementations")
-        plt.grid(axis='y', linestyle=':', alpha=0.6)
-        plt.xticks([i + bar_width * (len(labels) - 1) / 2 for i in x_positions], x_labels)
-        plt.legend(bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
-        if config_text:
-            plt.subplots_adjust(bottom=0.12)
-            plt.figtext(0.45, 0.02, config_text, ha='center', fontsize=9, style='italic')
-        combined_time = os.path.join(out_dir, f"combined_time{config_suffix}.svg")
-        plt.savefig(combined_time, bbox_inches="tight")
-        plt.close()
-        created.append(combined_time)
-        
-        # Combined speedup bar plot
-        plt.figure(figsize=(12, 6))
-        baseline = seq_time
-        
-        for idx, label in enumerate(labels):
-            thread_map = data[label]
-            ordered = OrderedDict(sorted(thread_map.items()))
-            
-            # Start with sequential speedup (1.0)
-            speedups = [baseline / seq_time]
-            x_pos = [0 + idx * bar_width]
-            for i, t in enumerate(canonical):
-                if t in ordered:
-                    speedups.append(baseline / ordered[t])
-                    x_pos.append((i + 1) + idx * bar_width)
-            
-            plt.bar(x_pos, speedups, width=bar_width, label=label,
-                    edgecolor='black', linewidth=0.5, color=colors[idx])
-        
-        plt.xlabel("Number of threads")
-        plt.ylabel("Speedup (baseline: sequential)")
-        plt.title("Speedup — all implementations")
-        plt.grid(axis='y', linestyle=':', alpha=0.6)
-        plt.xticks([i + bar_width * (len(labels) - 1) / 2 for i in x_positions], x_labels)
-        plt.legend(bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
-        if config_text:
-            plt.subplots_adjust(bottom=0.12)
-            plt.figtext(0.45, 0.02, config_text, ha='center', fontsize=9, style='italic')
-        combined_speed = os.path.join(out_dir, f"combined_speedup{config_suffix}.svg")
-        plt.savefig(combined_speed, bbox_inches="tight")
-        plt.close()
-        created.append(combined_speed)
+        colors = np.take(_TAB10, np.arange(len(labels)) % 10, axis=0)
+        xticks = x_base + bar_width * (len(labels) - 1) / 2
+
+        # Combined execution time and speedup bar plots
+        for kind, values, title, ylabel in (
+            ("time", times_mat, "Execution time — all implementations", "Per-loop time (s)"),
+            ("speedup", speedups_mat, "Speedup — all implementations", "Speedup (baseline: sequential)"),
+        ):
+            ax.clear()
+            for idx, label in enumerate(labels):
+                mask = present[idx]
+                ax.bar(x_base[mask] + idx * bar_width, values[idx, mask], width=bar_width, label=label,
+                       edgecolor='black', linewidth=0.5, color=colors[idx])
+            ax.legend(bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
+            combined_file = os.path.join(out_dir, f"combined_{kind}{config_suffix}.svg")
+            _finish(fig, ax, combined_file, title, ylabel, xticks, x_labels, config_text, text_x=0.45)
+            created.append(combined_file)
     
+    plt.close(fig)
+    _flush_writes()
     return created
 
 
+def dump_results(path: str, data, metadata: dict, sequential_data: dict):
+    # Tuple config keys are not valid JSON keys, so baselines are stored as records
+    payload = {
+        "data": {label: {str(t): v for t, v in thread_map.items()} for label, thread_map in data.items()},
+        "metadata": metadata,
+        "sequential": [
+            {"dataset_size_MB": size, "numCoords": coords, "numClusters": clusters, "time": time}
+            for (size, coords, clusters), time in sequential_data.items()
+        ],
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fh:
+        if orjson is not None:
+            fh.write(orjson.dumps(payload))
+        else:
+            fh.write(json.dumps(payload).encode())
+
+
 def main():
+    # --no-plot only parses and writes the aggregated results as JSON
+    no_plot = "--no-plot" in sys.argv[1:]
     results_root = os.path.abspath(os.path.join(HERE, "..", "results"))
     files = find_result_files(results_root)
     if not files:
         print("No result files found under", results_root)
         return
     print(f"Found {len(files)} result files")
-    data, _, metadata, sequential_data = aggregate_runs(files, results_root)
+    out_dir = os.path.join(HERE, "..", "diagrams")
+    cache_path = os.path.join(out_dir, ".parse_cache.pkl")
+    data, metadata, sequential_data = aggregate_runs(files, results_root, cache_path)
     
     print(f"Found {len(sequential_data)} sequential baseline(s):")
     for config_key, time in sequential_data.items():
         print(f"  Config {config_key}: {time:.4f}s")
+
+    if no_plot:
+        json_path = os.path.join(out_dir, "results.json")
+        dump_results(json_path, data, metadata, sequential_data)
+        print("Wrote", json_path)
+        return
     
-    out_dir = os.path.join(HERE, "..", "diagrams")
     created = plot_per_implementation(data, out_dir, metadata, sequential_data)
     created += plot_combined(data, out_dir, metadata, sequential_data)
     print("Created plots:")
@@ -1,16 +1,22 @@
 import re
+import sys
 import matplotlib.pyplot as plt
 import numpy as np
 from pathlib import Path
 
+# Emit SVG text as <text> instead of converting glyphs to paths
+plt.rcParams['svg.fonttype'] = 'none'
+
+_NLOOPS_RE = re.compile(r'nloops\s+=\s+\d+\s+\(total\s+=\s+([\d.]+)s\)')
+_PAR_HEADER = '--- nthreads = '
+
 # Read sequential baseline
 def parse_sequential(filename):
     try:
-        with open(filename, 'r') as f:
-            content = f.read()
-            match = re.search(r'nloops\s+=\s+\d+\s+\(total\s+=\s+([\d.]+)s\)', content)
-            if match:
-                return float(match.group(1))
+        content = Path(filename).read_text()
+        match = _NLOOPS_RE.search(content)
+        if match:
+            return float(match.group(1))
     except FileNotFoundError:
         print(f"Warning: {filename} not found")
     return None
@@ -18,19 +24,18 @@ def parse_sequential(filename):
 # Parse parallel execution times
 def parse_parallel(filename):
     try:
-        with open(filename, 'r') as f:
-            content = f.read()
+        content = Path(filename).read_text()
     except FileNotFoundError:
         print(f"Warning: {filename} not found")
         return {}
     
     results = {}
-    # Find all thread configurations
-    pattern = r'--- nthreads = (\d+) ---.*?nloops\s+=\s+\d+\s+\(total\s+=\s+([\d.]+)s\)'
-    matches = re.findall(pattern, content, re.DOTALL)
-    
-    for threads, time in matches:
-        results[int(threads)] = float(time)
+    # One block per thread configuration, timing searched only inside its own block
+    for block in content.split(_PAR_HEADER)[1:]:
+        threads, _, rest = block.partition(' ---')
+        match = _NLOOPS_RE.search(rest)
+        if match:
+            results[int(threads)] = float(match.group(1))
     
     return results
 
@@ -118,7 +123,7 @@ ax1.set_axisbelow(True)
 
 plt.tight_layout()
 output_file1 = plots_dir / 'execution_time_comparison.svg'
-plt.savefig(output_file1, format='svg', bbox_inches='tight')
+plt.savefig(output_file1, format='svg')
 print(f"\n✓ Execution time plot saved as '{output_file1}'")
 plt.close()
 
@@ -149,93 +154,49 @@ ax2.set_axisbelow(True)
 
 plt.tight_layout()
 output_file2 = plots_dir / 'speedup_comparison.svg'
-plt.savefig(output_file2, format='svg', bbox_inches='tight')
+plt.savefig(output_file2, format='svg')
 print(f"✓ Speedup plot saved as '{output_file2}'")
 plt.close()
 
 # --- Generate summary statistics table ---
-print("\n" + "="*100)
-print("SPEEDUP SUMMARY TABLE")
-print("="*100)
-print(f"{'Lock Type':<22}", end='')
-for t in thread_counts:
-    print(f"{t:>10} threads", end='')
-print()
-print("-"*100)
+# (implementations x thread counts) matrices, NaN where a thread count is missing
+threads_arr = np.asarray(thread_counts)
+times_matrix = np.array([[data.get(t, np.nan) for t in thread_counts] for data in all_data.values()])
+speedups_matrix = seq_time / times_matrix
+efficiency_matrix = speedups_matrix / threads_arr * 100
+
+def format_row(name, values, fmt):
+    return f"{name:<22}" + "".join(f"{'N/A':>17}" if np.isnan(v) else fmt.format(v) for v in values) + "\n"
 
+table_header = f"{'Lock Type':<22}" + "".join(f"{t:>10} threads" for t in thread_counts) + "\n"
+
+out = ["\n" + "="*100 + "\n", "SPEEDUP SUMMARY TABLE\n", "="*100 + "\n", table_header, "-"*100 + "\n"]
 # Print sequential first
-print(f"{'Sequential':<22}", end='')
-for t in thread_counts:
-    print(f"{1.0:>17.2f}x", end='')
-print()
-
-for name, data in all_data.items():
-    print(f"{name:<22}", end='')
-    for t in thread_counts:
-        if t in data:
-            speedup = seq_time / data[t]
-            print(f"{speedup:>17.2f}x", end='')
-        else:
-            print(f"{'N/A':>17}", end='')
-    print()
-
-print("\n" + "="*100)
-print("EXECUTION TIME SUMMARY TABLE (seconds)")
-print("="*100)
-print(f"{'Lock Type':<22}", end='')
-for t in thread_counts:
-    print(f"{t:>10} threads", end='')
-print()
-print("-"*100)
-
-print(f"{'Sequential':<22}{seq_time:>17.4f}")
-for name, data in all_data.items():
-    print(f"{name:<22}", end='')
-    for t in thread_counts:
-        if t in data:
-            print(f"{data[t]:>17.4f}", end='')
-        else:
-            print(f"{'N/A':>17}", end='')
-    print()
+out.append(format_row('Sequential', np.ones(len(thread_counts)), "{:>17.2f}x"))
+out.extend(format_row(name, row, "{:>17.2f}x") for name, row in zip(all_data, speedups_matrix))
+
+out += ["\n" + "="*100 + "\n", "EXECUTION TIME SUMMARY TABLE (seconds)\n", "="*100 + "\n", table_header, "-"*100 + "\n"]
+out.append(f"{'Sequential':<22}{seq_time:>17.4f}\n")
+out.extend(format_row(name, row, "{:>17.4f}") for name, row in zip(all_data, times_matrix))
+sys.stdout.write("".join(out))
 
 # --- Best performance analysis ---
-print("\n" + "="*100)
-print("BEST PERFORMING LOCK PER THREAD COUNT")
-print("="*100)
-for t in thread_counts:
-    valid_locks = {name: data[t] for name, data in all_data.items() if t in data}
-    if valid_locks:
-        best_name = min(valid_locks.keys(), key=lambda k: valid_locks[k])
-        best_time = valid_locks[best_name]
-        best_speedup = seq_time / best_time
-        print(f"{t:>3} threads: {best_name:<22} Time: {best_time:>8.4f}s  Speedup: {best_speedup:>6.2f}x")
+out = ["\n" + "="*100 + "\n", "BEST PERFORMING LOCK PER THREAD COUNT\n", "="*100 + "\n"]
+if times_matrix.size:
+    # Fastest lock per column; missing runs count as infinitely slow
+    names = list(all_data)
+    best_idx = np.where(np.isnan(times_matrix), np.inf, times_matrix).argmin(axis=0)
+    best_times = times_matrix[best_idx, np.arange(len(thread_counts))]
+    best_speedups = seq_time / best_times
+    for t, idx, best_time, best_speedup in zip(thread_counts, best_idx, best_times, best_speedups):
+        if not np.isnan(best_time):
+            out.append(f"{t:>3} threads: {names[idx]:<22} Time: {best_time:>8.4f}s  Speedup: {best_speedup:>6.2f}x\n")
+sys.stdout.write("".join(out))
 
 # --- Efficiency Analysis ---
-print("\n" + "="*100)
-print("PARALLEL EFFICIENCY (Speedup / Number of Threads)")
-print("="*100)
-print(f"{'Lock Type':<22}", end='')
-for t in thread_counts:
-    print(f"{t:>10} threads", end='')
-print()
-print("-"*100)
-
+out = ["\n" + "="*100 + "\n", "PARALLEL EFFICIENCY (Speedup / Number of Threads)\n", "="*100 + "\n", table_header, "-"*100 + "\n"]
 # Print sequential efficiency (100% by definition for 1 thread)
-print(f"{'Sequential':<22}", end='')
-for t in thread_counts:
-    efficiency = (1.0 / t) * 100
-    print(f"{efficiency:>16.1f}%", end='')
-print()
-
-for name, data in all_data.items():
-    print(f"{name:<22}", end='')
-    for t in thread_counts:
-        if t in data:
-            speedup = seq_time / data[t]
-            efficiency = (speedup / t) * 100
-            print(f"{efficiency:>16.1f}%", end='')
-        else:
-            print(f"{'N/A':>17}", end='')
-    print()
-
-print("\n" + "="*100)
\ No newline at end of file
+out.append(format_row('Sequential', (1.0 / threads_arr) * 100, "{:>16.1f}%"))
+out.extend(format_row(name, row, "{:>16.1f}%") for name, row in zip(all_data, efficiency_matrix))
+out.append("\n" + "="*100 + "\n")
+sys.stdout.write("".join(out))
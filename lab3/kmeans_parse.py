@@ -0,0 +1,210 @@
+import mmap
+import os
+import pickle
+import re
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+# Parsing of the KMeans result logs, shared by plot_results.py, plot_all_speedups.py and plot_speedup.py
+
+_SEPARATOR = b'~' * 80
+_SEQ_RE = re.compile(rb'Sequential Kmeans.*?t_loop_avg = ([\d.]+) ms', re.DOTALL)
+_COORDS_RE = re.compile(rb'numCoords = (\d+)')
+_BS_RE = re.compile(rb'block_size = (\d+)')
+_TIME_RES = {
+    'gpu': re.compile(rb't_gpu_avg = ([\d.]+) ms'),
+    'transfers': re.compile(rb't_transfers_avg = ([\d.]+) ms'),
+    'cpu': re.compile(rb't_cpu_avg = ([\d.]+) ms'),
+    'total': re.compile(rb't_loop_avg = ([\d.]+) ms'),
+}
+_IMPL_LINE_RE = re.compile(rb'^(.*Kmeans.*?)$', re.MULTILINE)
+_IMPL_RE = re.compile(rb'\|-+([^|]+?)\s*Kmeans[^|]*\|')
+
+# Per block size records handed to the plotters, one structured array per implementation
+BREAKDOWN_DTYPE = np.dtype([('bs', 'i4'), ('gpu', 'f8'), ('transfers', 'f8'), ('cpu', 'f8'), ('total', 'f8')])
+TIME_DTYPE = np.dtype([('bs', 'i4'), ('time', 'f8')])
+
+# Parsed sections are pickled under .cache/kmeans_parse/, keyed by the file's name, mtime and size
+_CACHE_DIR = os.path.join('.cache', 'kmeans_parse')
+# Part of every entry's name: bump it whenever parsing changes, so entries of an older parser are never read back
+_CACHE_VERSION = 1
+
+def _cache_path(filename, mtime_ns, size):
+    return os.path.join(_CACHE_DIR, f'{os.path.basename(filename)}.v{_CACHE_VERSION}.{mtime_ns}.{size}.pkl')
+
+def _load_cached(cache_path):
+    # A missing or unreadable cache entry just means the file gets parsed again
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+def _store_cached(filename, cache_path, result):
+    # Write to a temporary file first so an interrupted run never leaves a torn entry;
+    # the cache is optional, a directory that cannot be written to just means no caching
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        return
+
+    # Only the newest entry of a log is ever read, drop the ones of its earlier versions
+    stale_re = re.compile(re.escape(os.path.basename(filename)) + r'(?:\.v\d+)?\.\d+\.\d+\.pkl')
+    for name in os.listdir(_CACHE_DIR):
+        if stale_re.fullmatch(name) and name != os.path.basename(cache_path):
+            try:
+                os.remove(os.path.join(_CACHE_DIR, name))
+            except OSError:
+                pass
+
+@contextmanager
+def _mapped(filename):
+    """Map the file read-only; an empty file (nothing to parse) cannot be mmapped"""
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            yield content
+
+def _sections(content):
+    """Yield (start, end) offsets of each '~' separated section, without slicing the content"""
+    start = 0
+    while True:
+        end = content.find(_SEPARATOR, start)
+        if end < 0:
+            yield start, len(content)
+            return
+        yield start, end
+        start = end + len(_SEPARATOR)
+
+def _float(match):
+    # None when the field is missing or not a number
+    if match is None:
+        return None
+    try:
+        return float(match.group(1))
+    except ValueError:
+        return None
+
+def _by_block_size(rows, dtype):
+    # Stable sort, so repeated runs of a block size keep their order in the log
+    arr = np.array(rows, dtype=dtype)
+    return arr[np.argsort(arr['bs'], kind='stable')]
+
+def parse_sections(filename):
+    """Return (seq_time, num_coords, sections) of a results file, cached in-process and on disk.
+
+    sections is a tuple with one dict per finished block_size section: 'bs',
+    the average 'gpu' / 'transfers' / 'cpu' / 'total' times (None when missing),
+    the first line mentioning Kmeans as 'header' and the implementation name in
+    the header box as 'impl' (both None when missing). The result is shared
+    between calls, so it must not be modified.
+    """
+    # A rewritten log gets a new key, so stale entries are never returned
+    st = os.stat(filename)
+    return _parse_sections(filename, st.st_mtime_ns, st.st_size)
+
+@lru_cache(maxsize=8)
+def _parse_sections(filename, mtime_ns, size):
+    cache_path = _cache_path(filename, mtime_ns, size)
+    cached = _load_cached(cache_path)
+    if cached is not None:
+        return cached
+
+    # mmap the log and scan it with bytes patterns: no full read/decode copy
+    with _mapped(filename) as content:
+        seq_time = _float(_SEQ_RE.search(content))
+        if seq_time is None:
+            seq_time = 0
+
+        coords_match = _COORDS_RE.search(content)
+        num_coords = int(coords_match.group(1)) if coords_match else 0
+
+        sections = []
+
+        # Every field is searched within its section's bounds of the mapped file
+        for start, end in _sections(content):
+            bs_match = _BS_RE.search(content, start, end)
+            if not bs_match:
+                continue
+            # block_size closes the section's first line, everything else comes after it
+            start = bs_match.end()
+            # Runs that never finished have no timing, drop them with one substring scan
+            loop_pos = content.find(b't_loop_avg', start, end)
+            if loop_pos < 0:
+                continue
+
+            # The header box is printed before t_loop_avg and the other averages right after it,
+            # so each search stops at (or starts from) that line instead of scanning the whole section
+            section = {'bs': int(bs_match.group(1))}
+            for field, pattern in _TIME_RES.items():
+                section[field] = _float(pattern.search(content, loop_pos, end))
+            header = _IMPL_LINE_RE.search(content, start, loop_pos)
+            section['header'] = header.group(1).decode().strip() if header else None
+            impl = _IMPL_RE.search(content, start, loop_pos)
+            section['impl'] = impl.group(1).decode().strip() if impl else None
+            sections.append(section)
+
+    result = (seq_time, num_coords, tuple(sections))
+    _store_cached(filename, cache_path, result)
+    return result
+
+def parse_breakdown_results(filename):
+    """Sequential time and {header line: BREAKDOWN_DTYPE array by block size} of each GPU implementation."""
+    if not os.path.exists(filename):
+        print(f"Error: {filename} not found.")
+        return 0, {}
+
+    seq_time, _, sections = parse_sections(filename)
+
+    impl_data = defaultdict(list)
+    for section in sections:
+        row = tuple(section[field] for field in BREAKDOWN_DTYPE.names)
+        if None in row:
+            continue
+        # Implementation name is the first line with 'Kmeans', unless it is the sequential one
+        header = section['header']
+        if header and 'Sequential' not in header:
+            impl_data[header].append(row)
+
+    impl_data = {name: _by_block_size(rows, BREAKDOWN_DTYPE) for name, rows in impl_data.items()}
+    return seq_time, impl_data
+
+def parse_results(filename):
+    """Parse results file and extract sequential time and implementation data (TIME_DTYPE arrays)."""
+    if not os.path.exists(filename):
+        print(f"Error: {filename} not found.")
+        return 0, {}, 0
+
+    seq_time, num_coords, sections = parse_sections(filename)
+
+    impl_data = defaultdict(list)
+    for section in sections:
+        if section['total'] is None or section['impl'] is None:
+            continue
+        # Clean up implementation name
+        impl_name = section['impl'].replace('-', '').strip()
+        impl_data[impl_name].append((section['bs'], section['total']))
+
+    impl_data = {name: _by_block_size(rows, TIME_DTYPE) for name, rows in impl_data.items()}
+    return seq_time, impl_data, num_coords
+
+def parse_all_gpu_results(filename):
+    """Sequential time and a TIME_DTYPE array of every block size, whatever the implementation."""
+    if not os.path.exists(filename):
+        print(f"Error: {filename} not found.")
+        return 0, np.empty(0, dtype=TIME_DTYPE)
+
+    seq_time, _, sections = parse_sections(filename)
+
+    rows = [(section['bs'], section['total']) for section in sections if section['total'] is not None]
+
+    return seq_time, _by_block_size(rows, TIME_DTYPE)
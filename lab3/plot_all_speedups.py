@@ -1,142 +1,97 @@
+import sys
+import matplotlib
+# Only open interactive windows when asked to; otherwise render off-screen
+if '--show' not in sys.argv[1:]:
+    matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
-import re
 import os
-import sys
 import argparse
+from pathlib import Path
 
-def parse_results(filename):
-    """Parse results file and extract sequential time and implementation data."""
-    if not os.path.exists(filename):
-        print(f"Error: {filename} not found.")
-        return 0, {}, 0
-
-    with open(filename, 'r') as f:
-        content = f.read()
-
-    # Extract Sequential Time
-    seq_section = re.search(r'Sequential Kmeans.*?t_loop_avg = ([\d.]+) ms', content, re.DOTALL)
-    seq_time = float(seq_section.group(1)) if seq_section else 0
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, HERE)
 
-    # Extract number of coordinates
-    coords_match = re.search(r'numCoords = (\d+)', content)
-    num_coords = int(coords_match.group(1)) if coords_match else 0
+from kmeans_parse import parse_results
 
-    # Split by separator
-    sections = content.split('~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~')
+# Colors for each implementation
+IMPL_COLORS = {
+    'Naive GPU': '#e74c3c',
+    'Transpose GPU': '#3498db',
+    'Shared GPU': '#2ecc71',
+    'Fulloffload GPU': '#FFD700',
+    'Naive': '#e74c3c',
+    'Transpose': '#3498db',
+    'Shared': '#2ecc71',
+    'Fulloffload': '#FFD700',
+    'Full-offload': '#FFD700',
+}
 
-    impl_data = {}
+# --include choices and the implementation names each one stands for (case-insensitive)
+_IMPL_MAPPING = {
+    'naive': ('Naive GPU', 'Naive'),
+    'transpose': ('Transpose GPU', 'Transpose'),
+    'shared': ('Shared GPU', 'Shared'),
+    'fulloffload': ('Fulloffload GPU', 'Fulloffload', 'Full-offload'),
+}
 
-    for section in sections:
-        if 'block_size' not in section:
-            continue
-        
-        try:
-            bs = int(re.search(r'block_size = (\d+)', section).group(1))
-            t_loop_avg = float(re.search(r't_loop_avg = ([\d.]+) ms', section).group(1))
-            
-            # Determine implementation type from the section header
-            impl_match = re.search(r'\|-+([^|]+?)\s*Kmeans[^|]*\|', section)
-            if not impl_match:
-                continue
-            
-            impl_name = impl_match.group(1).strip()
-            # Clean up implementation name
-            impl_name = impl_name.replace('-', '').strip()
-            
-            if impl_name not in impl_data:
-                impl_data[impl_name] = []
-            
-            impl_data[impl_name].append({'bs': bs, 'time': t_loop_avg})
-            
-        except (AttributeError, ValueError):
-            continue
-
-    return seq_time, impl_data, num_coords
+def _resolve_includes(include_impls):
+    """Names selected by the --include choices, in the order given, or None when 'all' is among them"""
+    names = {}
+    for impl in include_impls:
+        impl_lower = impl.lower()
+        if impl_lower == 'all':
+            return None
+        names.update(dict.fromkeys(_IMPL_MAPPING.get(impl_lower, ())))
+    return tuple(names)
 
 def filter_implementations(impl_data, include_impls):
     """Filter implementations based on include list."""
     if not include_impls:
         return impl_data
     
-    # Create mapping for case-insensitive matching
-    impl_mapping = {
-        'naive': ['Naive GPU', 'Naive'],
-        'transpose': ['Transpose GPU', 'Transpose'],
-        'shared': ['Shared GPU', 'Shared'],
-        'fulloffload': ['Fulloffload GPU', 'Fulloffload', 'Full-offload'],
-        'all': None  # Special case to include all
-    }
-    
-    # Build list of implementations to include
-    impls_to_include = set()
-    for impl in include_impls:
-        impl_lower = impl.lower()
-        if impl_lower == 'all':
-            return impl_data
-        if impl_lower in impl_mapping:
-            for variant in impl_mapping[impl_lower]:
-                if variant in impl_data:
-                    impls_to_include.add(variant)
-    
-    # Filter the data
-    filtered_data = {k: v for k, v in impl_data.items() if k in impls_to_include}
-    return filtered_data
+    impls_to_include = _resolve_includes(include_impls)
+    if impls_to_include is None:
+        return impl_data
+    
+    # Look up only the selected names instead of scanning every parsed implementation
+    return {name: impl_data[name] for name in impls_to_include if name in impl_data}
 
-def plot_all_speedups(seq_time, impl_data, num_coords, filename):
+def plot_all_speedups(seq_time, impl_data, num_coords, filename, show=False):
     """Create bar plot comparing speedups of all implementations."""
     if not impl_data:
         print("No data to plot.")
         return
 
-    # Sort each implementation's data by block size
-    for impl_name in impl_data:
-        impl_data[impl_name].sort(key=lambda x: x['bs'])
-    
     # Get all block sizes (assuming all implementations have same block sizes)
-    block_sizes = [d['bs'] for d in list(impl_data.values())[0]]
+    block_sizes = list(impl_data.values())[0]['bs'].tolist()
     
     # Create plot
     fig, ax = plt.subplots(figsize=(14, 7))
     
-    # Colors for each implementation
-    colors = {
-        'Naive GPU': '#e74c3c',
-        'Transpose GPU': '#3498db',
-        'Shared GPU': '#2ecc71',
-        'Fulloffload GPU': '#FFD700',
-        'Naive': '#e74c3c',
-        'Transpose': '#3498db',
-        'Shared': '#2ecc71',
-        'Fulloffload': '#FFD700',
-        'Full-offload': '#FFD700',
-    }
-    
     # Width and positions for grouped bars
     x = np.arange(len(block_sizes))
     n_impls = len(impl_data)
     width = 0.8 / n_impls  # Adjust width based on number of implementations
     offsets = np.linspace(-(n_impls-1)*width/2, (n_impls-1)*width/2, n_impls)
+    impl_names = sorted(impl_data.keys())
+    color_list = [IMPL_COLORS.get(name, '#95a5a6') for name in impl_names]
+    # Add speedup values on top of bars (only if not too crowded)
+    show_values = len(block_sizes) <= 7 and n_impls <= 4
     
     # Plot bars for each implementation
-    for i, (impl_name, offset) in enumerate(zip(sorted(impl_data.keys()), offsets)):
-        data = impl_data[impl_name]
-        speedups = [seq_time / d['time'] for d in data]
+    for impl_name, offset, color in zip(impl_names, offsets, color_list):
+        speedups = seq_time / impl_data[impl_name]['time']
         
         bars = ax.bar(x + offset, speedups, width, 
                      label=impl_name, 
-                     color=colors.get(impl_name, '#95a5a6'),
+                     color=color,
                      edgecolor='black', 
                      linewidth=0.8)
         
-        # Add speedup values on top of bars (only if not too crowded)
-        if len(block_sizes) <= 7 and n_impls <= 4:
-            for bar, speedup in zip(bars, speedups):
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{speedup:.1f}x',
-                       ha='center', va='bottom', 
-                       fontweight='bold', fontsize=8, rotation=0)
+        if show_values:
+            ax.bar_label(bars, labels=[f'{speedup:.1f}x' for speedup in speedups],
+                         fontweight='bold', fontsize=8)
     
     ax.set_ylabel('Speedup (Sequential / GPU)', fontweight='bold', fontsize=13)
     ax.set_xlabel('Block Size', fontweight='bold', fontsize=13)
@@ -154,16 +109,16 @@ def plot_all_speedups(seq_time, impl_data, num_coords, filename):
     plt.tight_layout()
     
     # Save plot
-    if not os.path.exists('plots'):
-        os.makedirs('plots')
+    os.makedirs('plots', exist_ok=True)
     
     # Create output filename based on input filename
-    base_name = os.path.splitext(os.path.basename(filename))[0]
-    out_filename = f'plots/{base_name}_speedup_comparison.svg'
+    out_filename = f'plots/{Path(filename).stem}_speedup_comparison.svg'
     
-    plt.savefig(out_filename, dpi=300)
+    plt.savefig(out_filename)
     print(f"Saved plot to {out_filename}")
-    plt.show()
+    if show:
+        plt.show()
+    plt.close(fig)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -186,6 +141,8 @@ Examples:
     parser.add_argument('--include', '-i', nargs='+', 
                        choices=['naive', 'transpose', 'shared', 'fulloffload', 'all'],
                        help='Include only specific implementations (default: all)')
+    parser.add_argument('--show', action='store_true',
+                       help='Also open the plot in a window after saving it')
     
     args = parser.parse_args()
     
@@ -212,7 +169,7 @@ Examples:
     for impl_name, data in impl_data.items():
         print(f"  {impl_name}: {len(data)} block sizes")
     
-    plot_all_speedups(seq_time, impl_data, num_coords, args.filename)
+    plot_all_speedups(seq_time, impl_data, num_coords, args.filename, show=args.show)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
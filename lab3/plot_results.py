@@ -1,64 +1,32 @@
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 import re
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
-def parse_results(filename):
-    if not os.path.exists(filename):
-        print(f"Error: {filename} not found.")
-        return 0, {}
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, HERE)
 
-    with open(filename, 'r') as f:
-        content = f.read()
+from kmeans_parse import parse_breakdown_results
 
-    # Extract Sequential Time
-    seq_section = re.search(r'Sequential Kmeans.*?t_loop_avg = ([\d.]+) ms', content, re.DOTALL)
-    seq_time = float(seq_section.group(1)) if seq_section else 0
-
-    # Split by the separator used in the file
-    sections = content.split('~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~')
-
-    impl_data = {}
-
-    for section in sections:
-        if 'block_size' not in section:
-            continue
-        try:
-            bs = int(re.search(r'block_size = (\d+)', section).group(1))
-            t_gpu = float(re.search(r't_gpu_avg = ([\d.]+) ms', section).group(1))
-            t_transfers = float(re.search(r't_transfers_avg = ([\d.]+) ms', section).group(1))
-            t_cpu = float(re.search(r't_cpu_avg = ([\d.]+) ms', section).group(1))
-            t_total = float(re.search(r't_loop_avg = ([\d.]+) ms', section).group(1))
-
-            entry = {'bs': bs, 'gpu': t_gpu, 'transfers': t_transfers, 'cpu': t_cpu, 'total': t_total}
-
-            # Find implementation name (first line with 'Kmeans' and not 'Sequential')
-            match = re.search(r'^(.*Kmeans.*?)$', section, re.MULTILINE)
-            if match and 'Sequential' not in match.group(1):
-                impl_name = match.group(1).strip()
-                if impl_name not in impl_data:
-                    impl_data[impl_name] = []
-                impl_data[impl_name].append(entry)
-        except (AttributeError, ValueError):
-            continue
-
-    return seq_time, impl_data
+_IMPL_NAME_RE = re.compile(r'\|\s*-*([^\|-]+?)-*\s*\|')
+_SPACES_RE = re.compile(r'\s+')
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9_]')
 
 def generate_plots(seq_time, data, title_suffix):
-    if not data:
+    if len(data) == 0:
         return
 
-    # Sort data by block size
-    data.sort(key=lambda x: x['bs'])
-    
-    bs_labels = [str(d['bs']) for d in data]
+    bs_labels = [str(bs) for bs in data['bs']]
     x_labels_time = bs_labels
     
-    gpu_times = np.array([d['gpu'] for d in data])
-    transfer_times = np.array([d['transfers'] for d in data])
-    cpu_times = np.array([d['cpu'] for d in data])
-    speedups = [seq_time / d['total'] for d in data]
+    gpu_times = data['gpu']
+    transfer_times = data['transfers']
+    cpu_times = data['cpu']
+    speedups = seq_time / data['total']
 
     # Broken y-axis: two subplots for time, one for speedup
     fig = plt.figure(figsize=(10, 7))
@@ -85,7 +53,7 @@ def generate_plots(seq_time, data, title_suffix):
 
     # Set y-limits for broken axis
     ax1_top.set_ylim(seq_time * 0.95, seq_time * 1.05)  # Show only around the sequential time
-    ax1_bottom.set_ylim(0, max(gpu_times + transfer_times + cpu_times) * 1.2)  # Show only the GPU bars
+    ax1_bottom.set_ylim(0, (gpu_times + transfer_times + cpu_times).max() * 1.2)  # Show only the GPU bars
 
     # Hide spines between axes
     ax1_top.spines['bottom'].set_visible(False)
@@ -130,20 +98,21 @@ def generate_plots(seq_time, data, title_suffix):
 
     # plt.tight_layout(rect=[0, 0.03, 1, 0.95])
     
-    if not os.path.exists('plots'):
-        os.makedirs('plots')
+    # Workers may get here at the same time
+    os.makedirs('plots', exist_ok=True)
 
     # Clean up the title_suffix for filename: lowercase, replace spaces with _, remove non-alphanum except _
-    import re
     clean_name = title_suffix.lower()
-    clean_name = re.sub(r'\s+', '_', clean_name)  # spaces to _
-    clean_name = re.sub(r'[^a-z0-9_]', '', clean_name)  # remove non-alphanum except _
+    clean_name = _SPACES_RE.sub('_', clean_name)  # spaces to _
+    clean_name = _NON_ALNUM_RE.sub('', clean_name)  # remove non-alphanum except _
     clean_name = clean_name.rstrip('_')
     if not clean_name:
         clean_name = 'kmeans'
     filename = f'plots/kmeans_{clean_name}.svg'
-    plt.savefig(filename, dpi=300)
-    print(f"Saved plot to {filename}")
+    plt.savefig(filename)
+    # Several plots are made per run, release each one once it is saved
+    plt.close(fig)
+    return filename
 
 def main():
     file_path = sys.argv[1] if len(sys.argv) > 1 else ''
@@ -152,21 +121,27 @@ def main():
         print("Usage: python plot_results.py <results_file>")
         return
 
-    seq_time, impl_data = parse_results(file_path)
+    seq_time, impl_data = parse_breakdown_results(file_path)
 
     if not impl_data:
         print("No implementation data found.")
         return
 
-    for impl_name, data in impl_data.items():
+    titles = []
+    for impl_name in impl_data:
         # Extract the name between the '|' characters, or fallback to impl_name
-        match = re.search(r'\|\s*-*([^\|-]+?)-*\s*\|', impl_name)
+        match = _IMPL_NAME_RE.search(impl_name)
         if match:
             name = match.group(1).strip()
         else:
             name = impl_name.strip()
-        title = f"{name} Implementation"
-        generate_plots(seq_time, data, title)
+        titles.append(f"{name} Implementation")
+
+    # Implementations are independent: render them on all cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        for filename in ex.map(generate_plots, [seq_time] * len(titles), impl_data.values(), titles):
+            if filename:
+                print(f"Saved plot to {filename}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
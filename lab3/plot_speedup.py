@@ -1,48 +1,27 @@
+import sys
+import matplotlib
+# Only open interactive windows when asked to; otherwise render off-screen
+SHOW = '--show' in sys.argv[1:]
+if not SHOW:
+    matplotlib.use('Agg')
+# Quick iterations can trade PNG size for encode speed; final plots keep the default compression
+DRAFT = '--draft' in sys.argv[1:]
 import matplotlib.pyplot as plt
 import numpy as np
-import re
 import os
 
-def parse_all_gpu_results(filename):
-    if not os.path.exists(filename):
-        print(f"Error: {filename} not found.")
-        return 0, []
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, HERE)
 
-    with open(filename, 'r') as f:
-        content = f.read()
+from kmeans_parse import parse_all_gpu_results
 
-    # Extract Sequential Time
-    seq_section = re.search(r'Sequential Kmeans.*?t_loop_avg = ([\d.]+) ms', content, re.DOTALL)
-    seq_time = float(seq_section.group(1)) if seq_section else 0
-
-    # Split by the separator
-    sections = content.split('~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~')
-
-    block_data = []
-
-    for section in sections:
-        if 'block_size' not in section:
-            continue
-        try:
-            bs = int(re.search(r'block_size = (\d+)', section).group(1))
-            t_loop_avg = float(re.search(r't_loop_avg = ([\d.]+) ms', section).group(1))
-            
-            block_data.append({'bs': bs, 'time': t_loop_avg})
-        except (AttributeError, ValueError):
-            continue
-
-    return seq_time, block_data
-
-def plot_speedup(seq_time, data):
-    if not data:
+def plot_speedup(seq_time, data, show=False, draft=False):
+    if len(data) == 0:
         print("No data to plot.")
         return
 
-    # Sort by block size
-    data.sort(key=lambda x: x['bs'])
-    
-    block_sizes = [d['bs'] for d in data]
-    speedups = [seq_time / d['time'] for d in data]
+    block_sizes = data['bs'].tolist()
+    speedups = seq_time / data['time']
 
     # Create plot
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -71,13 +50,14 @@ def plot_speedup(seq_time, data):
     plt.tight_layout()
     
     # Save plot
-    if not os.path.exists('plots'):
-        os.makedirs('plots')
+    os.makedirs('plots', exist_ok=True)
     
     filename = 'plots/kmeans_all_gpu_speedup.png'
-    plt.savefig(filename, dpi=300)
+    plt.savefig(filename, dpi=300, pil_kwargs={'compress_level': 1} if draft else None)
     print(f"Saved plot to {filename}")
-    plt.show()
+    if show:
+        plt.show()
+    plt.close(fig)
 
 def main():
     filename = 'results/run_kmeans_all_gpu.out'
@@ -91,7 +71,7 @@ def main():
     print(f"Sequential time: {seq_time:.2f} ms")
     print(f"Found {len(block_data)} block size configurations")
     
-    plot_speedup(seq_time, block_data)
+    plot_speedup(seq_time, block_data, show=SHOW, draft=DRAFT)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,76 +6,120 @@ Creates:
 2. Bar charts showing total and computation time for 8, 16, 32, 64 MPI processes
 """
 
+import matplotlib
+# Plots are only ever saved to files, render them off-screen
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 from collections import defaultdict
+import os
 import re
+import sys
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from log_cache import cache_path, load_cached, mapped, store_cached
+
+_JACOBI_SERIAL_RE = re.compile(r'Jacobi X (\d+) Y \d+ Iter \d+ Time ([\d.]+)')
+_GS_SERIAL_RE = re.compile(r'GaussSeidelSOR X (\d+) Y \d+ Iter \d+ Time ([\d.]+)')
+_RB_SERIAL_RE = re.compile(r'RedBlackSOR X (\d+) Y \d+ Iter \d+ Time ([\d.]+)')
+# Method tag printed by the MPI runs -> display name (serial spellings accepted too)
+_MPI_METHODS = {
+    'Jacobi': 'Jacobi',
+    'Gauss-Seidel-SOR': 'Gauss-Seidel SOR',
+    'GaussSeidelSOR': 'Gauss-Seidel SOR',
+    'Red-Black-SOR': 'Red-Black SOR',
+    'RedBlackSOR': 'Red-Black SOR',
+}
+# A line either starts a block of runs with a new task count or reports one run
+_MPI_LINE_RE = re.compile(
+    rb'^(?:Num MPI Tasks: (?P<num_procs>\d+)|'
+    rb'(' + '|'.join(map(re.escape, _MPI_METHODS)).encode() + rb') X (\d+) Y \d+ Px \d+ Py \d+ Iter \d+ '
+    rb'ComputationTime ([\d.]+) CommunicationTime ([\d.]+) '
+    rb'ConvergenceTime ([\d.]+) TotalTime ([\d.]+))',
+    re.MULTILINE
+)
+# Bar chart tick labels, one word per line
+_METHOD_LABEL = {'Jacobi': 'Jacobi', 'Gauss-Seidel SOR': 'Gauss-Seidel\nSOR', 'Red-Black SOR': 'Red-Black\nSOR'}
 
 # Data structures to hold parsed results
-serial_data = {}  # {method: {size: time}}
+serial_data = defaultdict(dict)  # {method: {size: time}}
 mpi_data = defaultdict(lambda: defaultdict(dict))  # {method: {num_procs: {size: {metrics}}}}
 
+# Parsed results are pickled under .cache/plot_mpi_performance/; bump the version whenever parsing changes
+_CACHE_VERSION = 1
+
 def parse_serial_results(filename):
-    """Parse serial execution results."""
+    """Parse serial execution results into {method: {size: time}}."""
     with open(filename, 'r') as f:
         content = f.read()
     
+    results = defaultdict(dict)
+    
     # Parse Jacobi results
-    jacobi_matches = re.findall(r'Jacobi X (\d+) Y \d+ Iter \d+ Time ([\d.]+)', content)
-    for size, time in jacobi_matches:
-        if 'Jacobi' not in serial_data:
-            serial_data['Jacobi'] = {}
-        serial_data['Jacobi'][int(size)] = float(time)
+    for match in _JACOBI_SERIAL_RE.finditer(content):
+        results['Jacobi'][int(match.group(1))] = float(match.group(2))
     
     # Parse Gauss-Seidel SOR results
-    gs_matches = re.findall(r'GaussSeidelSOR X (\d+) Y \d+ Iter \d+ Time ([\d.]+)', content)
-    for size, time in gs_matches:
-        if 'Gauss-Seidel SOR' not in serial_data:
-            serial_data['Gauss-Seidel SOR'] = {}
-        serial_data['Gauss-Seidel SOR'][int(size)] = float(time)
+    for match in _GS_SERIAL_RE.finditer(content):
+        results['Gauss-Seidel SOR'][int(match.group(1))] = float(match.group(2))
     
     # Parse Red-Black SOR results
-    rb_matches = re.findall(r'RedBlackSOR X (\d+) Y \d+ Iter \d+ Time ([\d.]+)', content)
-    for size, time in rb_matches:
-        if 'Red-Black SOR' not in serial_data:
-            serial_data['Red-Black SOR'] = {}
-        serial_data['Red-Black SOR'][int(size)] = float(time)
+    for match in _RB_SERIAL_RE.finditer(content):
+        results['Red-Black SOR'][int(match.group(1))] = float(match.group(2))
+    
+    return results
 
-def parse_mpi_results(filename, method='Jacobi'):
-    """Parse MPI execution results for a given method."""
-    with open(filename, 'r') as f:
-        lines = f.readlines()
+def parse_mpi_results_all(filename):
+    """Parse MPI execution results of every method in a single pass over the file.
     
+    Returns {method: {num_procs: {size: {metrics}}}}.
+    """
+    results = defaultdict(dict)
     current_num_procs = None
     
-    for line in lines:
-        # Check for number of MPI tasks
-        num_match = re.match(r'Num MPI Tasks: (\d+)', line)
-        if num_match:
-            current_num_procs = int(num_match.group(1))
-            continue
-        
-        # Parse Jacobi results
-        if method == 'Jacobi':
-            jacobi_match = re.match(
-                r'Jacobi X (\d+) Y \d+ Px \d+ Py \d+ Iter \d+ '
-                r'ComputationTime ([\d.]+) CommunicationTime ([\d.]+) '
-                r'ConvergenceTime ([\d.]+) TotalTime ([\d.]+)',
-                line
-            )
-            if jacobi_match and current_num_procs:
-                size = int(jacobi_match.group(1))
-                comp_time = float(jacobi_match.group(2))
-                comm_time = float(jacobi_match.group(3))
-                conv_time = float(jacobi_match.group(4))
-                total_time = float(jacobi_match.group(5))
+    # The regex engine walks the mapped file, only matching lines come back to Python
+    with mapped(filename) as content:
+        for line_match in _MPI_LINE_RE.finditer(content):
+            # Check for number of MPI tasks
+            num_procs = line_match['num_procs']
+            if num_procs:
+                current_num_procs = int(num_procs)
+                continue
+            
+            # Parse results of whichever method printed the line
+            if current_num_procs:
+                method = _MPI_METHODS[line_match.group(2).decode()]
+                size = int(line_match.group(3))
+                comp_time = float(line_match.group(4))
+                comm_time = float(line_match.group(5))
+                conv_time = float(line_match.group(6))
+                total_time = float(line_match.group(7))
                 
-                mpi_data[method][current_num_procs][size] = {
+                results[method].setdefault(current_num_procs, {})[size] = {
                     'computation': comp_time,
                     'communication': comm_time,
                     'convergence': conv_time,
                     'total': total_time
                 }
+    
+    return results
+
+def _cached_parse(filename, parser, what, use_cache=True):
+    """parser(filename), reusing the cache entry of an unchanged log; reports which of the two happened"""
+    path = cache_path('plot_mpi_performance', filename, _CACHE_VERSION)
+    if use_cache:
+        result = load_cached(path)
+        if result is not None:
+            print(f"Using cached {what} results...")
+            return result
+    
+    print(f"Parsing {what} results...")
+    result = dict(parser(filename))
+    if use_cache:
+        store_cached(path, result)
+    return result
 
 def plot_speedup_curves():
     """Generate speedup plots for each table size."""
@@ -101,6 +145,9 @@ def plot_speedup_curves():
     
     for idx, size in enumerate(sizes):
         ax = axes[idx]
+        # Log scales go on before any line, so autoscaling only ever runs under them
+        ax.set_xscale('log', base=2)
+        ax.set_yscale('log', base=2)
         
         for method in available_methods:
             if size not in serial_data[method]:
@@ -109,15 +156,9 @@ def plot_speedup_curves():
             serial_time = serial_data[method][size]
             
             # Get all processor counts for this method and size
-            proc_counts = []
-            speedups = []
-            
-            for num_procs in sorted(mpi_data[method].keys()):
-                if size in mpi_data[method][num_procs]:
-                    total_time = mpi_data[method][num_procs][size]['total']
-                    speedup = serial_time / total_time
-                    proc_counts.append(num_procs)
-                    speedups.append(speedup)
+            proc_counts = [p for p in sorted(mpi_data[method].keys()) if size in mpi_data[method][p]]
+            total_times = np.array([mpi_data[method][p][size]['total'] for p in proc_counts])
+            speedups = serial_time / total_times
             
             if proc_counts:
                 ax.plot(proc_counts, speedups, 
@@ -144,13 +185,24 @@ def plot_speedup_curves():
         ax.set_title(f'{size}×{size} Table', fontsize=12, fontweight='bold')
         ax.grid(True, linestyle='--', alpha=0.4)
         ax.legend(fontsize=10)
-        ax.set_xscale('log', base=2)
-        ax.set_yscale('log', base=2)
     
-    plt.tight_layout()
-    plt.savefig('speedup_plots.svg', dpi=300, bbox_inches='tight')
+    fig.tight_layout()
+    fig.savefig('speedup_plots.svg', bbox_inches='tight')
     print("Saved speedup plots to speedup_plots.svg")
-    plt.close()
+    plt.close(fig)
+
+def _time_tables(methods, sizes, proc_counts):
+    """(size, procs, method) arrays of computation and total time, NaN where there is no run."""
+    comps = np.full((len(sizes), len(proc_counts), len(methods)), np.nan)
+    totals = np.full_like(comps, np.nan)
+    for method_idx, method in enumerate(methods):
+        for proc_idx, num_procs in enumerate(proc_counts):
+            runs = mpi_data[method].get(num_procs, {})
+            for size_idx, size in enumerate(sizes):
+                if size in runs:
+                    comps[size_idx, proc_idx, method_idx] = runs[size]['computation']
+                    totals[size_idx, proc_idx, method_idx] = runs[size]['total']
+    return comps, totals
 
 def plot_time_bars():
     """Generate bar charts for computation and total time (8, 16, 32, 64 processes)."""
@@ -180,28 +232,27 @@ def plot_time_bars():
     colors_total = {'Jacobi': '#AED6F1', 'Gauss-Seidel SOR': '#F5B7B1', 'Red-Black SOR': '#A9DFBF'}
     edge_colors = {'Jacobi': '#2874A6', 'Gauss-Seidel SOR': '#A93226', 'Red-Black SOR': '#27AE60'}
     
+    # Styling in available_methods order, each subplot picks the methods it has data for by index
+    comp_color_array = np.array([colors_comp[m] for m in available_methods])
+    total_color_array = np.array([colors_total[m] for m in available_methods])
+    edge_color_array = np.array([edge_colors[m] for m in available_methods])
+    
+    comps, totals = _time_tables(available_methods, sizes, proc_counts)
+    
+    # Max time of each size, for a common y-axis scale per row (0 when a size has no runs)
+    max_times = np.nan_to_num(totals).max(axis=(1, 2))
+    
     for size_idx, size in enumerate(sizes):
-        # Find max time for this size to set common y-axis scale
-        max_time = 0
-        for num_procs in proc_counts:
-            for method in available_methods:
-                if num_procs in mpi_data[method] and size in mpi_data[method][num_procs]:
-                    total_time = mpi_data[method][num_procs][size]['total']
-                    max_time = max(max_time, total_time)
+        max_time = max_times[size_idx]
         
         for proc_idx, num_procs in enumerate(proc_counts):
             ax = axes[size_idx, proc_idx]
             
             # Prepare data for this subplot
-            method_names = []
-            comp_times = []
-            total_times = []
-            
-            for method in available_methods:
-                if num_procs in mpi_data[method] and size in mpi_data[method][num_procs]:
-                    method_names.append(method)
-                    comp_times.append(mpi_data[method][num_procs][size]['computation'])
-                    total_times.append(mpi_data[method][num_procs][size]['total'])
+            present = np.flatnonzero(~np.isnan(totals[size_idx, proc_idx]))
+            method_names = [available_methods[i] for i in present]
+            comp_times = comps[size_idx, proc_idx, present]
+            total_times = totals[size_idx, proc_idx, present]
             
             if not method_names:
                 ax.text(0.5, 0.5, 'No Data', ha='center', va='center')
@@ -215,33 +266,26 @@ def plot_time_bars():
             # Create bars
             bars1 = ax.bar(x - width/2, comp_times, width, 
                           label='Computation Time',
-                          color=[colors_comp[m] for m in method_names],
-                          edgecolor=[edge_colors[m] for m in method_names],
+                          color=comp_color_array[present],
+                          edgecolor=edge_color_array[present],
                           linewidth=1.5)
             bars2 = ax.bar(x + width/2, total_times, width, 
                           label='Total Time',
-                          color=[colors_total[m] for m in method_names],
-                          edgecolor=[edge_colors[m] for m in method_names],
+                          color=total_color_array[present],
+                          edgecolor=edge_color_array[present],
                           linewidth=1.5)
             
             # Add values on top of bars
-            for bar, time in zip(bars1, comp_times):
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2, height + max_time*0.01,
-                       f'{time:.2f}s', ha='center', va='bottom', 
-                       fontsize=8, fontweight='bold')
-            
-            for bar, time in zip(bars2, total_times):
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2, height + max_time*0.01,
-                       f'{time:.2f}s', ha='center', va='bottom', 
-                       fontsize=8, fontweight='bold')
+            ax.bar_label(bars1, labels=[f'{time:.2f}s' for time in comp_times],
+                         padding=3, fontsize=8, fontweight='bold')
+            ax.bar_label(bars2, labels=[f'{time:.2f}s' for time in total_times],
+                         padding=3, fontsize=8, fontweight='bold')
             
             # Formatting
             ax.set_ylabel('Time (seconds)', fontweight='bold', fontsize=10)
             ax.set_title(f'{size}×{size}, {num_procs} procs', fontsize=11, fontweight='bold')
             ax.set_xticks(x)
-            ax.set_xticklabels([m.replace(' ', '\n') for m in method_names], 
+            ax.set_xticklabels([_METHOD_LABEL[m] for m in method_names], 
                               fontsize=9, rotation=0)
             ax.set_ylim(0, max_time * 1.15)  # Common y-scale for this size with extra space for labels
             ax.grid(True, linestyle='--', alpha=0.4, axis='y')
@@ -250,24 +294,24 @@ def plot_time_bars():
             if size_idx == 0 and proc_idx == len(proc_counts) - 1:
                 ax.legend(fontsize=9, loc='upper right')
     
-    plt.tight_layout()
-    plt.savefig('time_bars.svg', dpi=300, bbox_inches='tight')
+    fig.tight_layout()
+    fig.savefig('time_bars.svg', bbox_inches='tight')
     print("Saved time bar charts to time_bars.svg")
-    plt.close()
+    plt.close(fig)
 
 def main():
     """Main function to parse data and generate plots."""
-    print("Parsing serial results...")
-    parse_serial_results('results_serial/serial.out')
-    print(f"Found serial data for methods: {list(serial_data.keys())}")
+    # Warm runs skip parsing altogether, unless --no-cache is given
+    use_cache = '--no-cache' not in sys.argv[1:]
     
-    print("\nParsing MPI results...")
-    # Parse Jacobi MPI results
-    parse_mpi_results('results/run_mpi_jacobi.out', 'Jacobi')
+    serial_data.update(_cached_parse('results_serial/serial.out', parse_serial_results, 'serial', use_cache))
+    print(f"Found serial data for methods: {list(serial_data.keys())}")
     
-    # TODO: Add parsing for other methods when data is available
-    # parse_mpi_results('results/run_mpi_gauss_seidel.out', 'Gauss-Seidel SOR')
-    # parse_mpi_results('results/run_mpi_red_black.out', 'Red-Black SOR')
+    print()
+    # Jacobi, Gauss-Seidel SOR and Red-Black SOR runs are all picked up from one read of the log
+    mpi_results = _cached_parse('results/run_mpi_jacobi.out', parse_mpi_results_all, 'MPI', use_cache)
+    for method, runs in mpi_results.items():
+        mpi_data[method].update(runs)
     
     print(f"Found MPI data for methods: {list(mpi_data.keys())}")
     
@@ -282,27 +326,28 @@ def main():
     print("\nGenerating time bar charts...")
     plot_time_bars()
     
-    # Print summary statistics
-    print("\n=== Performance Summary ===")
+    # Print summary statistics, built as a list of lines and written out in one go
+    lines = ["\n=== Performance Summary ==="]
     for method in sorted(mpi_data.keys()):
         if method in serial_data:
-            print(f"\n{method}:")
+            lines.append(f"\n{method}:")
             for size in sorted(serial_data[method].keys()):
                 serial_time = serial_data[method][size]
-                print(f"  Table Size {size}×{size}:")
-                print(f"    Serial Time: {serial_time:.4f}s")
+                lines.append(f"  Table Size {size}×{size}:")
+                lines.append(f"    Serial Time: {serial_time:.4f}s")
                 
                 proc_counts = sorted(mpi_data[method].keys())
                 if proc_counts:
-                    print(f"    MPI Processes | Total Time | Speedup")
-                    print(f"    " + "-" * 42)
+                    lines.append(f"    MPI Processes | Total Time | Speedup")
+                    lines.append(f"    " + "-" * 42)
                     for num_procs in proc_counts:
                         if size in mpi_data[method][num_procs]:
                             total_time = mpi_data[method][num_procs][size]['total']
                             speedup = serial_time / total_time
-                            print(f"    {num_procs:13d} | {total_time:10.4f}s | {speedup:7.2f}x")
+                            lines.append(f"    {num_procs:13d} | {total_time:10.4f}s | {speedup:7.2f}x")
     
-    print("\nDone!")
+    lines.append("\nDone!")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == '__main__':
     main()
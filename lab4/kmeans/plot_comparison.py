@@ -1,28 +1,49 @@
+import matplotlib
+# Plots are only ever saved to files, render them off-screen
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 import re
 import os
 import sys
 
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from log_cache import cache_path, load_cached, mapped, pack_config, store_cached, unpack_config
+
+_CONFIG_RE = re.compile(rb'dataset_size = ([\d.]+) MB\s+numObjs = (\d+)\s+numCoords = (\d+)\s+numClusters = (\d+)')
+_OMP_RESULT_RE = re.compile(rb'number of threads: (\d+)\).*?per loop =\s+([\d.]+)s', re.DOTALL)
+_MPI_RESULT_RE = re.compile(rb'Num MPI Tasks: (\d+).*?per loop =\s+([\d.]+)s', re.DOTALL)
+
+# One record per run, sorted by worker count
+OPENMP_DTYPE = np.dtype([('num_threads', 'i4'), ('time', 'f8')])
+MPI_DTYPE = np.dtype([('num_tasks', 'i4'), ('time', 'f8')])
+
+# Parsed (config, results) are kept as .npz under .cache/plot_comparison/; bump the version whenever parsing changes
+_CACHE_VERSION = 1
+
 def parse_openmp_results(filename):
     """Parse OpenMP k-means results file."""
     if not os.path.exists(filename):
         print(f"Error: {filename} not found.")
         return None
     
-    with open(filename, 'r') as f:
-        content = f.read()
+    # mmap the log and scan it with bytes patterns, no read() copy
+    with mapped(filename) as content:
+        # Extract configuration from first line
+        config_match = _CONFIG_RE.search(content)
+        # Copy the groups out while the mapping is still open
+        config_groups = config_match.groups() if config_match else None
+        
+        # Extract all results
+        matches = _OMP_RESULT_RE.findall(content)
     
-    # Extract configuration from first line
-    config_match = re.search(r'dataset_size = ([\d.]+) MB\s+numObjs = (\d+)\s+numCoords = (\d+)\s+numClusters = (\d+)', content)
-    if not config_match:
+    if not config_groups:
         print("Error: Could not parse configuration from OpenMP file.")
         return None
     
-    dataset_size = config_match.group(1)
-    num_objs = config_match.group(2)
-    num_coords = config_match.group(3)
-    num_clusters = config_match.group(4)
+    dataset_size, num_objs, num_coords, num_clusters = (group.decode() for group in config_groups)
     
     config = {
         'dataset_size': dataset_size,
@@ -31,23 +52,15 @@ def parse_openmp_results(filename):
         'numClusters': num_clusters
     }
     
-    # Extract all results
-    pattern = r'number of threads: (\d+)\).*?per loop =\s+([\d.]+)s'
-    matches = re.findall(pattern, content, re.DOTALL)
-    
     if not matches:
         print("Error: Could not parse timing data from OpenMP file.")
         return None
     
-    results = []
-    for num_threads, time_per_loop in matches:
-        results.append({
-            'num_threads': int(num_threads),
-            'time': float(time_per_loop)
-        })
+    results = np.array([(int(num_threads), float(time_per_loop)) for num_threads, time_per_loop in matches],
+                       dtype=OPENMP_DTYPE)
     
     # Sort by number of threads
-    results.sort(key=lambda x: x['num_threads'])
+    results = results[np.argsort(results['num_threads'], kind='stable')]
     
     return config, results
 
@@ -57,19 +70,21 @@ def parse_mpi_results(filename):
         print(f"Error: {filename} not found.")
         return None
     
-    with open(filename, 'r') as f:
-        content = f.read()
+    # mmap the log and scan it with bytes patterns, no read() copy
+    with mapped(filename) as content:
+        # Extract configuration from first line
+        config_match = _CONFIG_RE.search(content)
+        # Copy the groups out while the mapping is still open
+        config_groups = config_match.groups() if config_match else None
+        
+        # Extract all results
+        matches = _MPI_RESULT_RE.findall(content)
     
-    # Extract configuration from first line
-    config_match = re.search(r'dataset_size = ([\d.]+) MB\s+numObjs = (\d+)\s+numCoords = (\d+)\s+numClusters = (\d+)', content)
-    if not config_match:
+    if not config_groups:
         print("Error: Could not parse configuration from MPI file.")
         return None
     
-    dataset_size = config_match.group(1)
-    num_objs = config_match.group(2)
-    num_coords = config_match.group(3)
-    num_clusters = config_match.group(4)
+    dataset_size, num_objs, num_coords, num_clusters = (group.decode() for group in config_groups)
     
     config = {
         'dataset_size': dataset_size,
@@ -78,41 +93,55 @@ def parse_mpi_results(filename):
         'numClusters': num_clusters
     }
     
-    # Extract all results
-    pattern = r'Num MPI Tasks: (\d+).*?per loop =\s+([\d.]+)s'
-    matches = re.findall(pattern, content, re.DOTALL)
-    
     if not matches:
         print("Error: Could not parse timing data from MPI file.")
         return None
     
-    results = []
-    for num_tasks, time_per_loop in matches:
-        results.append({
-            'num_tasks': int(num_tasks),
-            'time': float(time_per_loop)
-        })
+    results = np.array([(int(num_tasks), float(time_per_loop)) for num_tasks, time_per_loop in matches],
+                       dtype=MPI_DTYPE)
     
     # Sort by number of tasks
-    results.sort(key=lambda x: x['num_tasks'])
+    results = results[np.argsort(results['num_tasks'], kind='stable')]
     
     return config, results
 
+def _cached_parse(filename, parser, use_cache=True):
+    """parser(filename), reusing the .npz cache entry of an unchanged log"""
+    if not use_cache or not os.path.exists(filename):
+        return parser(filename)
+    
+    path = cache_path('plot_comparison', filename, _CACHE_VERSION, tag=parser.__name__, ext='npz')
+    cached = load_cached(path)
+    if cached is not None:
+        return unpack_config(cached)
+    
+    result = parser(filename)
+    # Failed parses are not cached, so their error messages show up on every run
+    if result is not None:
+        store_cached(path, pack_config(*result))
+    return result
+
+def _align(workers, values, all_workers):
+    """values (sorted by workers) laid out over all_workers, 0 where a worker count has no run"""
+    idx = np.minimum(np.searchsorted(workers, all_workers), len(workers) - 1)
+    present = workers[idx] == all_workers
+    return present, np.where(present, values[idx], 0.0)
+
 def generate_comparison_plot(openmp_config, openmp_results, mpi_config, mpi_results, output_dir='plots'):
     """Generate comparison speedup plot for OpenMP and MPI."""
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
     # Extract data
-    openmp_threads = [r['num_threads'] for r in openmp_results]
-    openmp_times = [r['time'] for r in openmp_results]
+    openmp_threads = openmp_results['num_threads']
+    openmp_times = openmp_results['time']
     openmp_baseline = openmp_times[0]
-    openmp_speedups = [openmp_baseline / t for t in openmp_times]
+    openmp_speedups = openmp_baseline / openmp_times
     
-    mpi_tasks = [r['num_tasks'] for r in mpi_results]
-    mpi_times = [r['time'] for r in mpi_results]
+    mpi_tasks = mpi_results['num_tasks']
+    mpi_times = mpi_results['time']
     mpi_baseline = mpi_times[0]
-    mpi_speedups = [mpi_baseline / t for t in mpi_times]
+    mpi_speedups = mpi_baseline / mpi_times
     
     # --- Create Comparison Speedup Plot ---
     fig, ax = plt.subplots(figsize=(12, 7))
@@ -121,20 +150,13 @@ def generate_comparison_plot(openmp_config, openmp_results, mpi_config, mpi_resu
     fig.suptitle(title, fontsize=14, fontweight='bold')
     
     # Prepare data for grouped bar plot
-    all_workers = sorted(set(openmp_threads + mpi_tasks))
+    all_workers = np.union1d(openmp_threads, mpi_tasks)
     x_pos = np.arange(len(all_workers))
     width = 0.35
     
-    # Create arrays for speedups, filling with None where data doesn't exist
-    openmp_speedup_array = []
-    mpi_speedup_array = []
-    
-    for workers in all_workers:
-        openmp_idx = next((i for i, r in enumerate(openmp_results) if r['num_threads'] == workers), None)
-        mpi_idx = next((i for i, r in enumerate(mpi_results) if r['num_tasks'] == workers), None)
-        
-        openmp_speedup_array.append(openmp_speedups[openmp_idx] if openmp_idx is not None else 0)
-        mpi_speedup_array.append(mpi_speedups[mpi_idx] if mpi_idx is not None else 0)
+    # Create arrays for speedups, filling with 0 where data doesn't exist
+    openmp_present, openmp_speedup_array = _align(openmp_threads, openmp_speedups, all_workers)
+    mpi_present, mpi_speedup_array = _align(mpi_tasks, mpi_speedups, all_workers)
     
     # Plot grouped bars
     bars1 = ax.bar(x_pos - width/2, openmp_speedup_array, width, 
@@ -154,42 +176,31 @@ def generate_comparison_plot(openmp_config, openmp_results, mpi_config, mpi_resu
     ax.grid(True, axis='y', linestyle='--', alpha=0.4)
     ax.legend(fontsize=11, loc='upper left')
     
-    # Annotate bars with speedup values
-    for bar, speedup in zip(bars1, openmp_speedup_array):
-        if speedup > 0:
-            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(openmp_speedup_array + mpi_speedup_array)*0.02,
-                   f'{speedup:.2f}x', ha='center', va='bottom', fontsize=9, color='#A93226', fontweight='bold')
-    
-    for bar, speedup in zip(bars2, mpi_speedup_array):
-        if speedup > 0:
-            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(openmp_speedup_array + mpi_speedup_array)*0.02,
-                   f'{speedup:.2f}x', ha='center', va='bottom', fontsize=9, color='#1F618D', fontweight='bold')
+    # Annotate bars with speedup values, leaving missing runs unlabelled
+    ax.bar_label(bars1, labels=[f'{speedup:.2f}x' if speedup > 0 else '' for speedup in openmp_speedup_array],
+                 padding=3, fontsize=9, color='#A93226', fontweight='bold')
+    ax.bar_label(bars2, labels=[f'{speedup:.2f}x' if speedup > 0 else '' for speedup in mpi_speedup_array],
+                 padding=3, fontsize=9, color='#1F618D', fontweight='bold')
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Save plot
     filename = os.path.join(output_dir, 'kmeans_speedup_comparison.svg')
-    plt.savefig(filename, dpi=300, bbox_inches='tight')
+    fig.savefig(filename, bbox_inches='tight')
     print(f"Saved comparison plot to {filename}")
     
-    plt.close()
+    # Both plots share the same 12x7 single-Axes layout: reuse the figure and only reset the Axes
+    ax.clear()
     
     # --- Create Execution Time Comparison Plot ---
-    fig2, ax2 = plt.subplots(figsize=(12, 7))
+    fig2, ax2 = fig, ax
     
     title2 = f"K-Means Execution Time Comparison: OpenMP vs MPI\n({openmp_config['numObjs']} objects, {openmp_config['numCoords']} coords, {openmp_config['numClusters']} clusters, {openmp_config['dataset_size']} MB)"
     fig2.suptitle(title2, fontsize=14, fontweight='bold')
     
     # Create arrays for execution times
-    openmp_time_array = []
-    mpi_time_array = []
-    
-    for workers in all_workers:
-        openmp_idx = next((i for i, r in enumerate(openmp_results) if r['num_threads'] == workers), None)
-        mpi_idx = next((i for i, r in enumerate(mpi_results) if r['num_tasks'] == workers), None)
-        
-        openmp_time_array.append(openmp_times[openmp_idx] if openmp_idx is not None else 0)
-        mpi_time_array.append(mpi_times[mpi_idx] if mpi_idx is not None else 0)
+    _, openmp_time_array = _align(openmp_threads, openmp_times, all_workers)
+    _, mpi_time_array = _align(mpi_tasks, mpi_times, all_workers)
     
     # Plot grouped bars
     bars1_time = ax2.bar(x_pos - width/2, openmp_time_array, width, 
@@ -204,87 +215,78 @@ def generate_comparison_plot(openmp_config, openmp_results, mpi_config, mpi_resu
     ax2.grid(True, axis='y', linestyle='--', alpha=0.4)
     ax2.legend(fontsize=11, loc='upper right')
     
-    # Annotate bars with time values
-    for bar, time_val in zip(bars1_time, openmp_time_array):
-        if time_val > 0:
-            ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(openmp_time_array + mpi_time_array)*0.02,
-                    f'{time_val:.4f}s', ha='center', va='bottom', fontsize=9, color='#A93226', fontweight='bold')
-    
-    for bar, time_val in zip(bars2_time, mpi_time_array):
-        if time_val > 0:
-            ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(openmp_time_array + mpi_time_array)*0.02,
-                    f'{time_val:.4f}s', ha='center', va='bottom', fontsize=9, color='#1F618D', fontweight='bold')
+    # Annotate bars with time values, leaving missing runs unlabelled
+    ax2.bar_label(bars1_time, labels=[f'{time_val:.4f}s' if time_val > 0 else '' for time_val in openmp_time_array],
+                  padding=3, fontsize=9, color='#A93226', fontweight='bold')
+    ax2.bar_label(bars2_time, labels=[f'{time_val:.4f}s' if time_val > 0 else '' for time_val in mpi_time_array],
+                  padding=3, fontsize=9, color='#1F618D', fontweight='bold')
     
-    plt.tight_layout()
+    fig2.tight_layout()
     
     # Save execution time plot
     filename2 = os.path.join(output_dir, 'kmeans_execution_time_comparison.svg')
-    plt.savefig(filename2, dpi=300, bbox_inches='tight')
+    fig2.savefig(filename2, bbox_inches='tight')
     print(f"Saved execution time comparison plot to {filename2}")
     
-    plt.close()
+    plt.close(fig2)
     
     # --- Print Summary Statistics ---
-    print("\n" + "="*80)
-    print("PERFORMANCE COMPARISON SUMMARY")
-    print("="*80)
-    print(f"Configuration: {openmp_config['numObjs']} objects, {openmp_config['numCoords']} coords, {openmp_config['numClusters']} clusters\n")
-    
-    print("OpenMP Results:")
-    print("-" * 60)
-    print(f"{'Threads':>10} | {'Time (s)':>10} | {'Speedup':>10} | {'Efficiency':>10}")
-    print("-" * 60)
-    for i, r in enumerate(openmp_results):
-        efficiency = openmp_speedups[i] / r['num_threads'] * 100
-        print(f"{r['num_threads']:>10} | {r['time']:>10.4f} | {openmp_speedups[i]:>9.2f}x | {efficiency:>9.2f}%")
-    
-    print("\nMPI Results:")
-    print("-" * 60)
-    print(f"{'Tasks':>10} | {'Time (s)':>10} | {'Speedup':>10} | {'Efficiency':>10}")
-    print("-" * 60)
-    for i, r in enumerate(mpi_results):
-        efficiency = mpi_speedups[i] / r['num_tasks'] * 100
-        print(f"{r['num_tasks']:>10} | {r['time']:>10.4f} | {mpi_speedups[i]:>9.2f}x | {efficiency:>9.2f}%")
+    # The tables are built as a list of lines and written out in one go
+    openmp_efficiency = openmp_speedups / openmp_threads * 100
+    mpi_efficiency = mpi_speedups / mpi_tasks * 100
+    
+    lines = ["", "="*80, "PERFORMANCE COMPARISON SUMMARY", "="*80,
+             f"Configuration: {openmp_config['numObjs']} objects, {openmp_config['numCoords']} coords, {openmp_config['numClusters']} clusters\n"]
+    
+    lines += ["OpenMP Results:", "-" * 60,
+              f"{'Threads':>10} | {'Time (s)':>10} | {'Speedup':>10} | {'Efficiency':>10}", "-" * 60]
+    lines += [f"{threads:>10} | {time:>10.4f} | {speedup:>9.2f}x | {efficiency:>9.2f}%"
+              for threads, time, speedup, efficiency in zip(openmp_threads, openmp_times, openmp_speedups, openmp_efficiency)]
+    
+    lines += ["\nMPI Results:", "-" * 60,
+              f"{'Tasks':>10} | {'Time (s)':>10} | {'Speedup':>10} | {'Efficiency':>10}", "-" * 60]
+    lines += [f"{tasks:>10} | {time:>10.4f} | {speedup:>9.2f}x | {efficiency:>9.2f}%"
+              for tasks, time, speedup, efficiency in zip(mpi_tasks, mpi_times, mpi_speedups, mpi_efficiency)]
     
     # Compare at same worker counts
-    print("\nDirect Comparison (at same worker counts):")
-    print("-" * 80)
-    print(f"{'Workers':>10} | {'OpenMP (s)':>12} | {'MPI (s)':>12} | {'Faster':>15} | {'Difference':>10}")
-    print("-" * 80)
-    
-    for workers in all_workers:
-        openmp_time = next((r['time'] for r in openmp_results if r['num_threads'] == workers), None)
-        mpi_time = next((r['time'] for r in mpi_results if r['num_tasks'] == workers), None)
+    lines += ["\nDirect Comparison (at same worker counts):", "-" * 80,
+              f"{'Workers':>10} | {'OpenMP (s)':>12} | {'MPI (s)':>12} | {'Faster':>15} | {'Difference':>10}", "-" * 80]
+    
+    both = openmp_present & mpi_present
+    for workers, openmp_time, mpi_time in zip(all_workers[both], openmp_time_array[both], mpi_time_array[both]):
+        if openmp_time < mpi_time:
+            faster = "OpenMP"
+            diff = ((mpi_time - openmp_time) / mpi_time) * 100
+        else:
+            faster = "MPI"
+            diff = ((openmp_time - mpi_time) / openmp_time) * 100
         
-        if openmp_time is not None and mpi_time is not None:
-            if openmp_time < mpi_time:
-                faster = "OpenMP"
-                diff = ((mpi_time - openmp_time) / mpi_time) * 100
-            else:
-                faster = "MPI"
-                diff = ((openmp_time - mpi_time) / openmp_time) * 100
-            
-            print(f"{workers:>10} | {openmp_time:>12.4f} | {mpi_time:>12.4f} | {faster:>15} | {diff:>9.2f}%")
-    
-    print("="*80)
+        lines.append(f"{workers:>10} | {openmp_time:>12.4f} | {mpi_time:>12.4f} | {faster:>15} | {diff:>9.2f}%")
+    
+    lines.append("="*80)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python plot_comparison.py <openmp_results_file> <mpi_results_file> [output_dir]")
+    # --no-cache re-parses the logs even when a cached parse of them exists
+    use_cache = '--no-cache' not in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != '--no-cache']
+    
+    if len(args) < 2:
+        print("Usage: python plot_comparison.py <openmp_results_file> <mpi_results_file> [output_dir] [--no-cache]")
         print("Example: python plot_comparison.py openmp_old_results/run_kmeans_reduction.out results/run_mpi_kmeans.out plots")
         return
     
-    openmp_file = sys.argv[1]
-    mpi_file = sys.argv[2]
-    output_dir = sys.argv[3] if len(sys.argv) > 3 else 'plots'
+    openmp_file = args[0]
+    mpi_file = args[1]
+    output_dir = args[2] if len(args) > 2 else 'plots'
     
     # Parse results
-    openmp_result = parse_openmp_results(openmp_file)
+    openmp_result = _cached_parse(openmp_file, parse_openmp_results, use_cache)
     if openmp_result is None:
         return
     openmp_config, openmp_results = openmp_result
     
-    mpi_result = parse_mpi_results(mpi_file)
+    mpi_result = _cached_parse(mpi_file, parse_mpi_results, use_cache)
     if mpi_result is None:
         return
     mpi_config, mpi_results = mpi_result
@@ -1,28 +1,54 @@
+import matplotlib
+# Plots are only ever saved to files, render them off-screen
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
 import re
 import os
 import sys
 
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from log_cache import cache_path, load_cached, mapped, pack_config, store_cached, unpack_config
+
+_CONFIG_RE = re.compile(rb'dataset_size = ([\d.]+) MB\s+numObjs = (\d+)\s+numCoords = (\d+)\s+numClusters = (\d+)')
+# One run per match: the task count, the configuration line printed right after it and the time per loop
+_RUN_RE = re.compile(
+    rb'Num MPI Tasks: (\d+)\s+'
+    rb'(?:dataset_size = ([\d.]+) MB\s+numObjs = (\d+)\s+numCoords = (\d+)\s+numClusters = (\d+))?'
+    rb'.*?per loop =\s+([\d.]+)s',
+    re.DOTALL
+)
+
+# One record per run, sorted by task count
+MPI_DTYPE = np.dtype([('num_tasks', 'i4'), ('time', 'f8')])
+
+# Parsed (config, results) are kept as .npz under .cache/plot_mpi_results/; bump the version whenever parsing changes
+_CACHE_VERSION = 1
+
 def parse_mpi_results(filename):
     """Parse MPI k-means results file."""
     if not os.path.exists(filename):
         print(f"Error: {filename} not found.")
         return None
     
-    with open(filename, 'r') as f:
-        content = f.read()
-    
-    # Extract configuration from first line
-    config_match = re.search(r'dataset_size = ([\d.]+) MB\s+numObjs = (\d+)\s+numCoords = (\d+)\s+numClusters = (\d+)', content)
-    if not config_match:
+    # mmap the log and pick up the configuration and every run in a single scan, no read() copy
+    with mapped(filename) as content:
+        # Copy the groups out while the mapping is still open
+        matches = [match.groups() for match in _RUN_RE.finditer(content)]
+        
+        # Configuration from the first run that printed it, the log is only searched again when none did
+        config_groups = next((groups[1:5] for groups in matches if groups[1] is not None), None)
+        if config_groups is None:
+            config_match = _CONFIG_RE.search(content)
+            config_groups = config_match.groups() if config_match else None
+    
+    if not config_groups:
         print("Error: Could not parse configuration.")
         return None
     
-    dataset_size = config_match.group(1)
-    num_objs = config_match.group(2)
-    num_coords = config_match.group(3)
-    num_clusters = config_match.group(4)
+    dataset_size, num_objs, num_coords, num_clusters = (group.decode() for group in config_groups)
     
     config = {
         'dataset_size': dataset_size,
@@ -31,37 +57,54 @@ def parse_mpi_results(filename):
         'numClusters': num_clusters
     }
     
-    # Extract all results
-    pattern = r'Num MPI Tasks: (\d+).*?per loop =\s+([\d.]+)s'
-    matches = re.findall(pattern, content, re.DOTALL)
-    
     if not matches:
         print("Error: Could not parse timing data.")
         return None
     
-    results = []
-    for num_tasks, time_per_loop in matches:
-        results.append({
-            'num_tasks': int(num_tasks),
-            'time': float(time_per_loop)
-        })
+    results = np.array([(int(num_tasks), float(time_per_loop)) for num_tasks, *_, time_per_loop in matches],
+                       dtype=MPI_DTYPE)
     
     # Sort by number of tasks
-    results.sort(key=lambda x: x['num_tasks'])
+    results = results[np.argsort(results['num_tasks'], kind='stable')]
     
     return config, results
 
+def _cached_parse(filename, use_cache=True):
+    """parse_mpi_results(filename), reusing the cache entry of an unchanged log"""
+    if not use_cache or not os.path.exists(filename):
+        return parse_mpi_results(filename)
+    
+    path = cache_path('plot_mpi_results', filename, _CACHE_VERSION, ext='npz')
+    cached = load_cached(path)
+    if cached is not None:
+        return unpack_config(cached)
+    
+    result = parse_mpi_results(filename)
+    # Failed parses are not cached, so their error messages show up on every run
+    if result is not None:
+        store_cached(path, pack_config(*result))
+    return result
+
+def _format_axis(ax, ylabel, x_pos, num_tasks):
+    """Labels, one tick per task count, legend and grid shared by both plots"""
+    ax.set_ylabel(ylabel, fontweight='bold', fontsize=12)
+    ax.set_xlabel('Number of MPI Tasks', fontweight='bold', fontsize=12)
+    ax.set_xticks(x_pos)
+    ax.set_xticklabels(num_tasks)
+    ax.legend(fontsize=11)
+    ax.grid(axis='y', linestyle='--', alpha=0.4)
+
 def generate_plots(config, results, output_dir='plots'):
     """Generate execution time and speedup plots."""
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    num_tasks = [r['num_tasks'] for r in results]
-    times = [r['time'] for r in results]
+    num_tasks = results['num_tasks']
+    times = results['time']
     
     # Calculate speedup relative to single task
     baseline_time = times[0]
-    speedups = [baseline_time / t for t in times]
+    speedups = baseline_time / times
     
     # --- Plot 1: Execution Time ---
     fig1, ax1 = plt.subplots(figsize=(10, 6))
@@ -78,76 +121,73 @@ def generate_plots(config, results, output_dir='plots'):
     ax1.axhline(baseline_time, color='#95A5A6', linestyle='--', linewidth=2, 
                 label=f'Baseline (1 task): {baseline_time:.4f}s', alpha=0.8)
     
-    ax1.set_ylabel('Execution Time (seconds)', fontweight='bold', fontsize=12)
-    ax1.set_xlabel('Number of MPI Tasks', fontweight='bold', fontsize=12)
-    ax1.set_xticks(x_pos)
-    ax1.set_xticklabels(num_tasks)
-    ax1.legend(fontsize=11)
-    ax1.grid(axis='y', linestyle='--', alpha=0.4)
+    _format_axis(ax1, 'Execution Time (seconds)', x_pos, num_tasks)
     
     # Add values on top of bars
-    for i, (bar, time) in enumerate(zip(bars1, times)):
-        ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + baseline_time*0.02,
+    label_offset = baseline_time * 0.02
+    for bar, time in zip(bars1, times):
+        ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + label_offset,
                 f'{time:.4f}s', ha='center', va='bottom', fontweight='bold', fontsize=10)
     
-    plt.tight_layout()
+    fig1.tight_layout()
     
     # Save execution time plot
     filename1 = os.path.join(output_dir, 'mpi_kmeans_execution_time.svg')
-    plt.savefig(filename1, dpi=300, bbox_inches='tight')
+    fig1.savefig(filename1, bbox_inches='tight')
     print(f"Saved plot to {filename1}")
     
-    plt.close()
+    # Both plots share the same 10x6 single-Axes layout: reuse the figure and only reset the Axes
+    ax1.clear()
     
     # --- Plot 2: Speedup ---
-    fig2, ax2 = plt.subplots(figsize=(10, 6))
+    fig2, ax2 = fig1, ax1
     
     title = f"K-Means MPI Speedup\n({config['numObjs']} objects, {config['numCoords']} coords, {config['numClusters']} clusters, {config['dataset_size']} MB)"
     fig2.suptitle(title, fontsize=14, fontweight='bold')
     
     bars2 = ax2.bar(x_pos, speedups, width, color='#58D68D', edgecolor='#28B463', linewidth=1.5, 
                     label='Speedup')
-
-    ax2.set_ylabel('Speedup (relative to 1 task)', fontweight='bold', fontsize=12)
-    ax2.set_xlabel('Number of MPI Tasks', fontweight='bold', fontsize=12)
-    ax2.set_xticks(x_pos)
-    ax2.set_xticklabels(num_tasks)
-    ax2.legend(fontsize=11)
-    ax2.grid(axis='y', linestyle='--', alpha=0.4)
+    
+    _format_axis(ax2, 'Speedup (relative to 1 task)', x_pos, num_tasks)
     
     # Add speedup values on bars
-    for i, (bar, speedup) in enumerate(zip(bars2, speedups)):
-        ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(speedups)*0.02,
+    label_offset = speedups.max() * 0.02
+    for bar, speedup in zip(bars2, speedups):
+        ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + label_offset,
                 f'{speedup:.2f}x', ha='center', va='bottom', 
                 fontweight='bold', fontsize=10)
     
-    plt.tight_layout()
+    fig2.tight_layout()
     
     # Save speedup plot
     filename2 = os.path.join(output_dir, 'mpi_kmeans_speedup.svg')
-    plt.savefig(filename2, dpi=300, bbox_inches='tight')
+    fig2.savefig(filename2, bbox_inches='tight')
     print(f"Saved plot to {filename2}")
     
-    plt.close()
+    plt.close(fig2)
     
     # Print summary statistics
     print("\n=== Performance Summary ===")
     print(f"Configuration: {config['numObjs']} objects, {config['numCoords']} coords, {config['numClusters']} clusters")
     print(f"\nNumber of Tasks | Time (s) | Speedup")
     print("-" * 45)
-    for i, r in enumerate(results):
-        print(f"{r['num_tasks']:15d} | {r['time']:8.4f} | {speedups[i]:7.2f}x")
+    for tasks, time, speedup in zip(num_tasks, times, speedups):
+        print(f"{tasks:15d} | {time:8.4f} | {speedup:7.2f}x")
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python plot_mpi_results.py <results_file> [output_dir]")
+    # --no-cache re-parses the log even when a cached parse of it exists
+    use_cache = '--no-cache' not in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != '--no-cache']
+    
+    if len(args) < 1:
+        print("Usage: python plot_mpi_results.py <results_file> [output_dir] [--no-cache]")
         print("Example: python plot_mpi_results.py results/run_mpi_kmeans.out plots")
         return
     
-    file_path = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else 'plots'
+    file_path = args[0]
+    output_dir = args[1] if len(args) > 1 else 'plots'
     
-    result = parse_mpi_results(file_path)
+    result = _cached_parse(file_path, use_cache)
     if result is None:
         return
     
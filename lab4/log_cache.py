@@ -0,0 +1,85 @@
+import mmap
+import os
+import pickle
+import re
+import zipfile
+from contextlib import contextmanager
+
+import numpy as np
+
+# Log access and the on-disk parse cache, shared by heat_transfer/plot_mpi_performance.py,
+# kmeans/plot_comparison.py and kmeans/plot_mpi_results.py
+
+_CACHE_ROOT = '.cache'
+# k-means run configuration, stored in .npz entries as one string array next to the results
+CONFIG_KEYS = ('dataset_size', 'numObjs', 'numCoords', 'numClusters')
+# What a missing, empty, truncated or corrupt entry raises while being read back
+_UNREADABLE = (OSError, EOFError, KeyError, ValueError, pickle.UnpicklingError, zipfile.BadZipFile)
+
+@contextmanager
+def mapped(filename):
+    """Map the file read-only; an empty file (nothing to parse) cannot be mmapped"""
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            yield content
+
+def cache_path(name, filename, version, tag=None, ext='pkl'):
+    """Path of filename's entry under .cache/<name>/, keyed by its name, mtime and size.
+
+    tag tells apart entries of the same log (e.g. the parser used) and version is
+    bumped by the caller whenever its parse changes, so older entries are never read.
+    An '.npz' ext stores a dict of arrays, anything else is pickled.
+    """
+    st = os.stat(filename)
+    prefix = os.path.basename(filename) + (f'.{tag}' if tag else '')
+    return os.path.join(_CACHE_ROOT, name, f'{prefix}.v{version}.{st.st_mtime_ns}.{st.st_size}.{ext}')
+
+def load_cached(path):
+    """The entry stored at path, or None when there is no readable one"""
+    # A missing or unreadable cache entry just means the log gets parsed again
+    try:
+        if path.endswith('.npz'):
+            with np.load(path) as cached:
+                return {key: cached[key] for key in cached.files}
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except _UNREADABLE:
+        return None
+
+def store_cached(path, result):
+    """Store result at path and drop the entries of older versions of the same log"""
+    cache_dir, entry = os.path.split(path)
+    # Write to a temporary file first so an interrupted run never leaves a torn entry;
+    # the cache is optional, a directory that cannot be written to just means no caching
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            if path.endswith('.npz'):
+                np.savez(f, **result)
+            else:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        return
+
+    # Only the newest entry of a log is ever read: '<prefix>.v<version>.<mtime>.<size>.<ext>'
+    prefix = entry.rsplit('.', 4)[0]
+    stale_re = re.compile(re.escape(prefix) + r'(?:\.v\d+)?\.\d+\.\d+\.(?:pkl|npz)')
+    for name in os.listdir(cache_dir):
+        if name != entry and stale_re.fullmatch(name):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+def pack_config(config, results):
+    """.npz arrays of a parsed k-means (config, results)"""
+    return {'config': np.array([config[key] for key in CONFIG_KEYS]), 'results': results}
+
+def unpack_config(cached):
+    """(config, results) back from pack_config's arrays"""
+    return dict(zip(CONFIG_KEYS, cached['config'].tolist())), cached['results']